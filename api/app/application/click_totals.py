@@ -0,0 +1,35 @@
+"""
+Click totals use-case — all-time clicks per item without rescanning history.
+
+Running totals are kept with a store-specific watermark; refresh() folds in
+only the clicks settled since the previous refresh and adds the recent,
+not yet settled ones on top (see AbstractClickRepository.count_increment),
+so reads stay exact and cheap.
+"""
+import threading
+from collections import Counter
+from typing import Any, Optional
+
+from app.domain.repositories import AbstractClickRepository
+
+
+class ClickTotals:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Counter = Counter()
+        self._mark: Any = None
+
+    def refresh(self, repo: AbstractClickRepository) -> dict[Optional[int], int]:
+        """Fold in new clicks and return the up-to-date totals."""
+        with self._lock:
+            settled, recent, mark, full = repo.count_increment(self._mark)
+            if full:
+                self._totals = Counter()
+            self._totals.update(settled)
+            self._mark = mark
+            totals = self._totals.copy()
+        totals.update(recent)
+        return dict(totals)
+
+
+click_totals = ClickTotals()
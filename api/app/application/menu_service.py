@@ -26,6 +26,10 @@ class MenuService:
     def update_item(self, item: MenuItem) -> MenuItem:
         return self.repo.update_menu_item(item)
 
+    def bulk_update_items(self, patches: list[dict]) -> list[dict]:
+        """patches: list of {"id": int, "fields": dict}; returns per-item results."""
+        return self.repo.bulk_update_menu_items(patches)
+
     def delete_item(self, item_id: int) -> bool:
         return self.repo.delete_menu_item(item_id)
 
@@ -0,0 +1,151 @@
+"""
+Popularity use-case — sliding-window click counts per menu item.
+
+Clicks land in fixed-size time buckets. Each supported window keeps a
+running total that is updated on every click and decremented as buckets
+slide out, so ranking never scans click history. New counts are drained
+to the DB as additive deltas by checkpoint(), which then reloads the merged
+counts so every worker ranks the clicks of all workers.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Collection, Optional
+
+from app.domain.repositories import AbstractPopularityRepository
+
+WINDOWS = {"1h": 3600, "6h": 6 * 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+MAX_LIMIT = 50
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class PopularityTracker:
+    def __init__(
+        self,
+        bucket_seconds: int = 300,
+        cache_seconds: float = 2.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.cache_seconds = cache_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: dict[int, Counter] = {}
+        self._totals: dict[str, Counter] = {w: Counter() for w in WINDOWS}
+        self._window_start: dict[str, int] = {}
+        self._pending: Counter = Counter()  # (item_id, bucket_start) -> clicks not yet checkpointed
+        self._top_cache: dict[str, tuple[float, list[tuple[int, int]]]] = {}
+        self._current: Optional[int] = None
+
+    # -- internals (lock held) --
+
+    def _bucket_of(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds) * self.bucket_seconds
+
+    def _advance(self, now: float) -> int:
+        current = self._bucket_of(now)
+        if current == self._current:
+            return current
+        for window, span in WINDOWS.items():
+            oldest = current - span + self.bucket_seconds
+            start = self._window_start.get(window, oldest)
+            totals = self._totals[window]
+            # Slide expired buckets out of the running total (amortised O(1))
+            while start < oldest:
+                for item_id, n in self._buckets.get(start, {}).items():
+                    left = totals[item_id] - n
+                    if left > 0:
+                        totals[item_id] = left
+                    else:
+                        del totals[item_id]
+                start += self.bucket_seconds
+            self._window_start[window] = oldest
+        horizon = current - max(WINDOWS.values()) + self.bucket_seconds
+        for start in [s for s in self._buckets if s < horizon]:
+            del self._buckets[start]
+        self._current = current
+        self._top_cache.clear()
+        return current
+
+    def _add(self, item_id: int, bucket: int, n: int) -> None:
+        self._buckets.setdefault(bucket, Counter())[item_id] += n
+        for window, start in self._window_start.items():
+            if bucket >= start:
+                self._totals[window][item_id] += n
+
+    # -- public API --
+
+    def record(self, item_id: int, n: int = 1) -> None:
+        with self._lock:
+            bucket = self._advance(self._clock())
+            self._add(item_id, bucket, n)
+            self._pending[(item_id, bucket)] += n
+
+    def top(self, window: str, limit: int = 10, eligible: Optional[Collection[int]] = None) -> list[dict]:
+        """Top items for a window; served from a short-lived cache of the ranking.
+
+        When `eligible` is given, only those item ids are ranked.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unsupported window '{window}'. Use one of: {', '.join(WINDOWS)}")
+        limit = max(0, min(limit, MAX_LIMIT))
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            cached = self._top_cache.get(window)
+            if cached is None or now - cached[0] > self.cache_seconds:
+                ranking = sorted(self._totals[window].items(), key=lambda kv: kv[1], reverse=True)
+                cached = self._top_cache[window] = (now, ranking)
+        ranking = cached[1] if eligible is None else (kv for kv in cached[1] if kv[0] in eligible)
+        return [{"item_id": item_id, "clicks": clicks} for item_id, clicks in islice(ranking, limit)]
+
+    def load(self, rows: list[tuple[int, datetime, int]]) -> None:
+        """Replace counts with checkpointed rows plus this worker's unsaved clicks."""
+        with self._lock:
+            self._buckets = {}
+            self._totals = {w: Counter() for w in WINDOWS}
+            self._window_start = {}
+            self._current = None
+            self._advance(self._clock())
+            oldest = min(self._window_start.values())
+            for item_id, bucket_start, clicks in rows:
+                bucket = self._bucket_of((bucket_start - _EPOCH).total_seconds())
+                if bucket >= oldest:
+                    self._add(item_id, bucket, clicks)
+            for (item_id, bucket), clicks in self._pending.items():
+                if bucket >= oldest:
+                    self._add(item_id, bucket, clicks)
+            self._top_cache.clear()
+
+    def load_from(self, repo: AbstractPopularityRepository) -> None:
+        since = datetime.utcnow() - timedelta(seconds=max(WINDOWS.values()))
+        self.load(repo.load_since(since))
+
+    def checkpoint(self, repo: AbstractPopularityRepository) -> int:
+        """Write click deltas gathered since the last checkpoint, then reload the
+        counts merged from all workers; returns rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            self.load_from(repo)
+            return 0
+        rows = [
+            (item_id, _EPOCH + timedelta(seconds=bucket), n)
+            for (item_id, bucket), n in pending.items()
+        ]
+        try:
+            repo.add_counts(rows)
+        except Exception:
+            # Keep the deltas for the next attempt
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        repo.prune_before(datetime.utcnow() - timedelta(seconds=max(WINDOWS.values())))
+        self.load_from(repo)
+        return len(rows)
+
+
+popularity = PopularityTracker()
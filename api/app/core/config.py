@@ -19,6 +19,37 @@ class Settings(BaseSettings):
     CORS_ORIGINS: list[str] = ["*"]
     APP_NAME: str = "Mady Restaurant API"
     DEBUG: bool = True
+    SLOW_QUERY_MS: float = 200.0  # statements slower than this land in the slow-query log
+    POPULARITY_CHECKPOINT_SECONDS: int = 60
+    CATALOGUE_VERSION_CHECK_SECONDS: float = 2.0  # max staleness of cached menu data per worker
+    STATIC_METADATA_TTL_SECONDS: float = 2.0  # re-stat interval for non-fingerprinted static files
+
+    # Click storage: "db" (ClickEvent rows) or "segments" (append-only log, needs numpy)
+    CLICK_STORE: str = "db"
+    CLICK_LOG_DIR: str = os.path.join(API_DIR, "data", "clicks")
+    CLICK_LOG_COMPACT_AFTER_DAYS: int = 7
+
+    # Admission control for POST /api/analytics/track
+    TRACK_RATE_PER_SECOND: float = 1.0   # sustained clicks per client IP
+    TRACK_BURST: int = 10
+    TRACK_DEDUPE_SECONDS: float = 2.0    # identical clicks inside this window are collapsed
+    TRACK_MAX_BACKLOG: int = 32          # concurrent click writes before shedding
+    TRACK_MAX_POOL_WAIT_MS: float = 250.0
+    TRACK_MAX_CLIENTS: int = 10_000      # LRU bound on per-client state
+    TRUST_PROXY_HEADERS: bool = bool(os.environ.get("VERCEL"))  # honour X-Forwarded-For
+    TRUSTED_PROXY_HOPS: int = 1          # proxies in front of the app that append to X-Forwarded-For
+
+    # Background jobs (app/infrastructure/jobs.py)
+    JOBS_QUEUE_SIZE: int = 1000          # in-memory backlog; submit() refuses work beyond it
+    JOBS_CONCURRENCY: int = 4            # worker threads
+    JOBS_CPU_WORKERS: int = 0            # processes for cpu=True jobs; 0 runs them on threads
+    JOBS_POLL_SECONDS: float = 5.0       # job table polling interval
+    JOBS_LEASE_SECONDS: float = 300.0    # a claimed job is re-run if not finished by then
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_RETRY_BASE_SECONDS: float = 2.0
+    JOBS_RETRY_MAX_SECONDS: float = 300.0
+    JOBS_RETENTION_DAYS: int = 7         # finished job rows are pruned after this
+    ANALYTICS_ROLLUP_SECONDS: int = 60   # folds new clicks into the all-time totals between reads
 
 
 settings = Settings()
@@ -67,6 +67,52 @@ class ClickEvent(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+# ---------------------------------------------------------------------------
+# Catalogue Version (single row, bumped on every menu/category write)
+# ---------------------------------------------------------------------------
+
+class CatalogueVersion(SQLModel, table=True):
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=1)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ---------------------------------------------------------------------------
+# Item Popularity (checkpointed click counts per time bucket)
+# ---------------------------------------------------------------------------
+
+class ItemPopularity(SQLModel, table=True):
+    item_id: int = Field(primary_key=True)
+    bucket_start: datetime = Field(primary_key=True, index=True)  # UTC, aligned to bucket size
+    clicks: int = Field(default=0)
+
+
+# ---------------------------------------------------------------------------
+# Background Job (durable work queue)
+# ---------------------------------------------------------------------------
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(index=True, max_length=100)
+    payload: str = Field(default="[]")  # JSON list of handler arguments
+    key: Optional[str] = Field(default=None, unique=True, max_length=200)  # dedupes periodic runs across workers
+    status: JobStatus = Field(default=JobStatus.QUEUED, index=True)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    run_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    locked_until: Optional[datetime] = Field(default=None)  # lease held by the worker running it
+    last_error: str = Field(default="")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
 
 # ---------------------------------------------------------------------------
 # Order Status
@@ -4,9 +4,10 @@ The application layer depends on THESE interfaces, not on concrete DB code.
 Swap the infrastructure implementation to change databases.
 """
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import datetime
+from typing import Any, Iterator, Optional
 
-from app.domain.models import Category, MenuItem, Order, OrderStatus
+from app.domain.models import Category, Job, MenuItem, Order, OrderStatus
 
 
 class AbstractMenuRepository(ABC):
@@ -25,6 +26,9 @@ class AbstractMenuRepository(ABC):
     @abstractmethod
     def update_menu_item(self, item: MenuItem) -> MenuItem: ...
 
+    @abstractmethod
+    def bulk_update_menu_items(self, patches: list[dict]) -> list[dict]: ...
+
     @abstractmethod
     def delete_menu_item(self, item_id: int) -> bool: ...
 
@@ -47,3 +51,81 @@ class AbstractOrderRepository(ABC):
 
     @abstractmethod
     def get_recent_orders(self, limit: int = 10) -> list[Order]: ...
+
+
+class AbstractPopularityRepository(ABC):
+    @abstractmethod
+    def load_since(self, since: datetime) -> list[tuple[int, datetime, int]]: ...
+
+    @abstractmethod
+    def add_counts(self, rows: list[tuple[int, datetime, int]]) -> None: ...
+
+    @abstractmethod
+    def prune_before(self, cutoff: datetime) -> int: ...
+
+
+class AbstractClickRepository(ABC):
+    @abstractmethod
+    def record(self, item_id: Optional[int]) -> None: ...
+
+    @abstractmethod
+    def count_per_item(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> dict[Optional[int], int]: ...
+
+    @abstractmethod
+    def count_increment(
+        self, mark: Any = None
+    ) -> tuple[dict[Optional[int], int], dict[Optional[int], int], Any, bool]: ...
+
+    @abstractmethod
+    def histogram(
+        self, since: datetime, until: datetime, bucket_seconds: int
+    ) -> list[tuple[datetime, int]]: ...
+
+    @abstractmethod
+    def iter_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        item_ids: Optional[list[int]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[list[tuple[Optional[int], Optional[int], datetime]]]: ...
+
+
+class AbstractJobRepository(ABC):
+    @abstractmethod
+    def enqueue(
+        self,
+        name: str,
+        payload: str,
+        run_at: datetime,
+        max_attempts: int,
+        key: Optional[str] = None,
+    ) -> Optional[Job]: ...
+
+    @abstractmethod
+    def claim_due(
+        self, names: list[str], now: datetime, lease_until: datetime, limit: int
+    ) -> list[Job]: ...
+
+    @abstractmethod
+    def complete(self, job_id: int) -> None: ...
+
+    @abstractmethod
+    def retry(self, job_id: int, run_at: datetime, error: str) -> None: ...
+
+    @abstractmethod
+    def fail(self, job_id: int, error: str) -> None: ...
+
+    @abstractmethod
+    def release(self, job_ids: list[int]) -> None: ...
+
+    @abstractmethod
+    def counts_by_status(self) -> dict[str, int]: ...
+
+    @abstractmethod
+    def oldest_due(self, now: datetime) -> Optional[datetime]: ...
+
+    @abstractmethod
+    def prune_finished(self, before: datetime) -> int: ...
@@ -0,0 +1,153 @@
+"""
+Infrastructure — admission control for the public click-tracking endpoint.
+
+Every decision is made in memory before a DB connection is touched:
+  * a token bucket per client IP caps sustained click rate,
+  * identical (client, item) clicks inside a short window are collapsed,
+  * all writes are shed while the write backlog or pool wait is too high.
+Client state lives in an LRU bounded by max_clients.
+"""
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.infrastructure.metrics import registry as metrics_registry
+
+
+class Admission(str, Enum):
+    ADMITTED = "admitted"
+    RATE_LIMITED = "rate_limited"
+    DEDUPLICATED = "deduplicated"
+    SHED = "shed"
+
+
+class _Client:
+    __slots__ = ("tokens", "updated", "recent")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.recent: dict[Optional[int], float] = {}  # item_id -> last admitted click
+
+
+class ClickAdmission:
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        dedupe_seconds: float,
+        max_backlog: int,
+        max_pool_wait_seconds: float,
+        max_clients: int,
+        pool_wait: Callable[[], float] = lambda: 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.dedupe_seconds = dedupe_seconds
+        self.max_backlog = max_backlog
+        self.max_pool_wait = max_pool_wait_seconds
+        self.max_clients = max_clients
+        self._pool_wait = pool_wait
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clients: "OrderedDict[str, _Client]" = OrderedDict()
+        self._backlog = 0
+        self.counts = {a: 0 for a in Admission}
+        self.evicted = 0
+
+    def admit(self, client: str, item_id: Optional[int]) -> Admission:
+        now = self._clock()
+        with self._lock:
+            decision = self._decide(client, item_id, now)
+            self.counts[decision] += 1
+            if decision is Admission.ADMITTED:
+                self._backlog += 1
+        return decision
+
+    def _decide(self, client: str, item_id: Optional[int], now: float) -> Admission:
+        # Global shedding first: it protects everyone and costs nothing to check
+        if self._backlog >= self.max_backlog or self._pool_wait() >= self.max_pool_wait:
+            return Admission.SHED
+
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = _Client(self.burst, now)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._clients.move_to_end(client)
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+
+        last = state.recent.get(item_id)
+        if last is not None and now - last < self.dedupe_seconds:
+            return Admission.DEDUPLICATED
+        if state.tokens < 1:
+            return Admission.RATE_LIMITED
+        state.tokens -= 1
+        if len(state.recent) >= 16:
+            # Only the dedupe window matters; drop anything older
+            state.recent = {k: t for k, t in state.recent.items() if now - t < self.dedupe_seconds}
+        state.recent[item_id] = now
+        return Admission.ADMITTED
+
+    def done(self) -> None:
+        """Call once an admitted click has been written (or failed)."""
+        with self._lock:
+            self._backlog -= 1
+
+    def retry_after(self) -> int:
+        return max(1, int(1 / self.rate)) if self.rate > 0 else 60
+
+    def prometheus_lines(self) -> list[str]:
+        with self._lock:
+            counts = dict(self.counts)
+            clients, backlog, evicted = len(self._clients), self._backlog, self.evicted
+        lines = [
+            "# HELP mady_track_admission_total Click-tracking admission decisions.",
+            "# TYPE mady_track_admission_total counter",
+        ]
+        lines += [f'mady_track_admission_total{{decision="{a.value}"}} {n}' for a, n in counts.items()]
+        lines += [
+            "# HELP mady_track_write_backlog Admitted clicks currently being written.",
+            "# TYPE mady_track_write_backlog gauge",
+            f"mady_track_write_backlog {backlog}",
+            "# HELP mady_track_clients Client entries held by the admission LRU.",
+            "# TYPE mady_track_clients gauge",
+            f"mady_track_clients {clients}",
+            "# HELP mady_track_clients_evicted_total Client entries evicted from the LRU.",
+            "# TYPE mady_track_clients_evicted_total counter",
+            f"mady_track_clients_evicted_total {evicted}",
+        ]
+        return lines
+
+
+def client_ip(headers, peer: Optional[str]) -> str:
+    """Best-effort client address; X-Forwarded-For is only honoured behind a trusted proxy.
+
+    Proxies append to the header, so only the right-most TRUSTED_PROXY_HOPS
+    entries were written by ours; anything left of them came from the client
+    and could be rotated to dodge the rate limit.
+    """
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if forwarded:
+            return forwarded[max(len(forwarded) - settings.TRUSTED_PROXY_HOPS, 0)]
+    return peer or "unknown"
+
+
+click_admission = ClickAdmission(
+    rate_per_second=settings.TRACK_RATE_PER_SECOND,
+    burst=settings.TRACK_BURST,
+    dedupe_seconds=settings.TRACK_DEDUPE_SECONDS,
+    max_backlog=settings.TRACK_MAX_BACKLOG,
+    max_pool_wait_seconds=settings.TRACK_MAX_POOL_WAIT_MS / 1000,
+    max_clients=settings.TRACK_MAX_CLIENTS,
+    pool_wait=metrics_registry.recent_pool_wait,
+)
+metrics_registry.register_collector(click_admission.prometheus_lines)
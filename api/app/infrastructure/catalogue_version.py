@@ -0,0 +1,138 @@
+"""
+Infrastructure — catalogue version counter for cross-worker cache coherence.
+
+Any session that writes a Category, SubCategory or MenuItem bumps the single
+catalogueversion row inside the same transaction (at most once per
+transaction). Workers compare their cached data against that counter,
+reading it at most once per CATALOGUE_VERSION_CHECK_SECONDS, so an admin
+edit made through one worker is visible to all others within that delay.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.models import Category, CatalogueVersion, MenuItem, SubCategory
+
+CATALOGUE_MODELS = (Category, SubCategory, MenuItem)
+_BUMPED = "catalogue_version_bumped"
+
+_table = CatalogueVersion.__table__
+_BUMP = update(_table).where(_table.c.id == 1).values(version=_table.c.version + 1)
+_VERSION = select(_table.c.version).where(_table.c.id == 1)
+
+
+def ensure_row(conn) -> None:
+    if conn.execute(select(_table.c.id).where(_table.c.id == 1)).first() is None:
+        conn.execute(insert(_table).values(id=1, version=1, updated_at=datetime.utcnow()))
+
+
+def _bump(session: Session) -> None:
+    if not session.info.get(_BUMPED):
+        conn = session.connection()
+        bump = _BUMP.values(updated_at=datetime.utcnow())
+        if conn.execute(bump).rowcount == 0:
+            # No row yet (tables created without create_db_and_tables()):
+            # an UPDATE of nothing would leave every cache valid forever
+            ensure_row(conn)
+            conn.execute(bump)
+        session.info[_BUMPED] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CATALOGUE_MODELS):
+            _bump(session)
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(state):
+    # Bulk UPDATE/DELETE statements bypass the flush
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ in CATALOGUE_MODELS:
+        _bump(state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop(_BUMPED, False):
+        # This worker made the edit: don't wait out the check interval
+        catalogue_version.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_BUMPED, None)
+
+
+class CatalogueVersionChecker:
+    def __init__(self, check_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._engine = None
+        self._version = 0
+        self._checked_at = float("-inf")
+
+    def bind(self, engine) -> None:
+        self._engine = engine
+
+    def current(self) -> int:
+        """Latest known version; hits the DB at most once per check interval."""
+        now = self._clock()
+        if now - self._checked_at < self.check_seconds:
+            return self._version
+        with self._lock:
+            if now - self._checked_at >= self.check_seconds:
+                self._version = self._read()
+                self._checked_at = self._clock()
+        return self._version
+
+    def _read(self) -> int:
+        with self._engine.connect() as conn:
+            row = conn.execute(_VERSION).first()
+        if row is not None:
+            return row[0]
+        # A missing row must not read as a fixed version: create it
+        try:
+            with self._engine.begin() as conn:
+                ensure_row(conn)
+        except IntegrityError:
+            pass  # another worker created it first
+        with self._engine.connect() as conn:
+            return conn.execute(_VERSION).scalar_one()
+
+    def invalidate(self) -> None:
+        self._checked_at = float("-inf")
+
+
+class VersionedCache:
+    """Small read-through cache whose entries are dropped when the catalogue version moves."""
+
+    def __init__(self, version: CatalogueVersionChecker):
+        self._version = version
+        self._lock = threading.Lock()
+        self._entries: dict[Any, tuple[int, Any]] = {}
+
+    def get_or_load(self, key: Any, loader: Callable[[], Any]) -> Any:
+        version = self._version.current()
+        entry: Optional[tuple[int, Any]] = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader()
+        with self._lock:
+            if any(v != version for v, _ in self._entries.values()):
+                self._entries.clear()
+            self._entries[key] = (version, value)
+        return value
+
+
+catalogue_version = CatalogueVersionChecker(settings.CATALOGUE_VERSION_CHECK_SECONDS)
+catalogue_cache = VersionedCache(catalogue_version)
@@ -0,0 +1,284 @@
+"""
+Append-only binary click log — an AbstractClickRepository for single-box
+deployments where one DB row per click is the bottleneck.
+
+Each click is a fixed 12-byte record (int64 epoch-ms, int32 item id; -1 for
+shop clicks) appended to one segment file per UTC day. O_APPEND writes of a
+whole record are atomic, so several workers on the same box can share the
+directory. Reads memory-map segments and aggregate with NumPy. compact()
+appends old day segments, each sorted by time, to one segment per month.
+
+Requires numpy (only when CLICK_STORE=segments).
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.domain.repositories import AbstractClickRepository
+
+RECORD = struct.Struct("<qi")
+SHOP_ITEM = -1
+_EPOCH = datetime(1970, 1, 1)
+_NAME = re.compile(r"^clicks-(\d{6}|\d{8})\.seg$")
+
+
+def _to_ms(dt: datetime) -> int:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(milliseconds=1)
+
+
+def _from_ms(ms: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=ms)
+
+
+def _records(path: Path) -> int:
+    """Whole records in a segment; 0 once a concurrent compact() removed it."""
+    try:
+        return path.stat().st_size // RECORD.size
+    except FileNotFoundError:
+        return 0
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+class SegmentClickLog(AbstractClickRepository):
+    def __init__(self, directory: Path, compact_after_days: int = 7):
+        try:
+            import numpy as np
+        except ImportError as e:  # pragma: no cover - depends on deployment
+            raise RuntimeError("CLICK_STORE=segments requires numpy (pip install numpy)") from e
+        self._np = np
+        self._dtype = np.dtype([("ts", "<i8"), ("item", "<i4")])
+        assert self._dtype.itemsize == RECORD.size
+
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compact_after_days = compact_after_days
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._fd_day: Optional[date] = None
+
+    # -- writing --
+
+    def record(self, item_id: Optional[int]) -> None:
+        if item_id is not None and not 0 <= item_id < 2**31:
+            raise ValueError(f"item_id out of range: {item_id}")
+        now_ms = int(time.time() * 1000)
+        data = RECORD.pack(now_ms, SHOP_ITEM if item_id is None else item_id)
+        day = _from_ms(now_ms).date()
+        with self._lock:
+            if day != self._fd_day:
+                # Rotate to the new day's segment
+                if self._fd is not None:
+                    os.close(self._fd)
+                path = self.directory / f"clicks-{day:%Y%m%d}.seg"
+                flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+                self._fd = os.open(path, flags, 0o644)
+                self._fd_day = day
+            os.write(self._fd, data)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd, self._fd_day = None, None
+
+    # -- reading --
+
+    def _segments(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> list[tuple[datetime, datetime, Path]]:
+        """Segments overlapping [since, until), oldest first."""
+        found = []
+        for path in self.directory.iterdir():
+            m = _NAME.match(path.name)
+            if not m:
+                continue
+            stamp = m.group(1)
+            if len(stamp) == 8:
+                start = datetime.strptime(stamp, "%Y%m%d")
+                end = start + timedelta(days=1)
+            else:
+                start = datetime.strptime(stamp, "%Y%m")
+                end = datetime.combine(_next_month(start.date()), datetime.min.time())
+            if (since is None or end > since) and (until is None or start < until):
+                found.append((start, end, path))
+        return sorted(found)
+
+    def _chunks(self, path: Path, chunk_records: int = 1 << 20, first: int = 0) -> Iterator:
+        """Yield record-array views over a memory-mapped segment, from record `first` on.
+
+        The map is not closed explicitly: views keep it alive and it is
+        released with the last of them, as with numpy.memmap.
+        """
+        try:
+            n = path.stat().st_size // RECORD.size  # ignore a torn trailing record
+            if n <= first:
+                return
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), n * RECORD.size, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return  # folded into a monthly segment by a concurrent compact()
+        for offset in range(first, n, chunk_records):
+            count = min(chunk_records, n - offset)
+            yield self._np.frombuffer(mm, dtype=self._dtype, count=count, offset=offset * RECORD.size)
+
+    def _in_range(self, view, since_ms: Optional[int], until_ms: Optional[int]):
+        ts = view["ts"]
+        mask = None
+        if since_ms is not None:
+            mask = ts >= since_ms
+        if until_ms is not None:
+            mask = (ts < until_ms) if mask is None else mask & (ts < until_ms)
+        return view if mask is None else view[mask]
+
+    def count_per_item(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> dict[Optional[int], int]:
+        np = self._np
+        since_ms = _to_ms(since) if since else None
+        until_ms = _to_ms(until) if until else None
+        totals: Counter = Counter()
+        for start, end, path in self._segments(since, until):
+            # Segments wholly inside the range skip the timestamp mask
+            lo = since_ms if since and start < since else None
+            hi = until_ms if until and end > until else None
+            for view in self._chunks(path):
+                # unique() rather than bincount(): memory follows the number of
+                # distinct ids, not the largest id value
+                ids, counts = np.unique(self._in_range(view, lo, hi)["item"], return_counts=True)
+                totals.update(dict(zip(ids.tolist(), counts.tolist())))
+        return {(None if item == SHOP_ITEM else item): n for item, n in totals.items()}
+
+    def count_increment(
+        self, mark: Optional[dict[str, int]] = None
+    ) -> tuple[dict[Optional[int], int], dict[Optional[int], int], dict[str, int], bool]:
+        """Per-item counts of records appended since `mark` ({segment name: records seen}).
+
+        Returns (counts, {}, new mark, is_full): appends are visible as soon
+        as they are written, so nothing is held back as recent. Segments
+        only grow until compact() folds them away; when a segment in `mark`
+        is gone or shorter than seen, the counts are recomputed in full and
+        is_full is True.
+        """
+        segments = [path for _, _, path in self._segments()]
+        seen = dict(mark or {})
+        full = mark is None or not seen.keys() <= {p.name for p in segments} or any(
+            seen.get(p.name, 0) > _records(p) for p in segments
+        )
+        if full:
+            seen = {}
+        totals: Counter = Counter()
+        for path in segments:
+            done = seen.get(path.name, 0)
+            for view in self._chunks(path, first=done):
+                ids, counts = self._np.unique(view["item"], return_counts=True)
+                totals.update(dict(zip(ids.tolist(), counts.tolist())))
+                done += len(view)
+            seen[path.name] = done
+        return {(None if item == SHOP_ITEM else item): n for item, n in totals.items()}, {}, seen, full
+
+    def histogram(
+        self, since: datetime, until: datetime, bucket_seconds: int
+    ) -> list[tuple[datetime, int]]:
+        np = self._np
+        since_ms, until_ms = _to_ms(since), _to_ms(until)
+        bucket_ms = bucket_seconds * 1000
+        n_buckets = max(1, -(-(until_ms - since_ms) // bucket_ms))
+        counts = np.zeros(n_buckets, dtype=np.int64)
+        for _, _, path in self._segments(since, until):
+            for view in self._chunks(path):
+                ts = self._in_range(view, since_ms, until_ms)["ts"]
+                counts += np.bincount((ts - since_ms) // bucket_ms, minlength=n_buckets)
+        return [(since + timedelta(seconds=i * bucket_seconds), int(n)) for i, n in enumerate(counts)]
+
+    def iter_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        item_ids: Optional[list[int]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[list[tuple[Optional[int], Optional[int], datetime]]]:
+        """Yield (None, item_id, created_at) batches; log records have no row id."""
+        np = self._np
+        since_ms = _to_ms(since) if since else None
+        until_ms = _to_ms(until) if until else None
+        wanted = np.asarray(item_ids, dtype=np.int32) if item_ids else None
+        for _, _, path in self._segments(since, until):
+            for view in self._chunks(path, chunk_records=batch_size):
+                rows = self._in_range(view, since_ms, until_ms)
+                if wanted is not None:
+                    rows = rows[np.isin(rows["item"], wanted)]
+                batch = [
+                    (None, None if item == SHOP_ITEM else item, _from_ms(ts))
+                    for ts, item in zip(rows["ts"].tolist(), rows["item"].tolist())
+                ]
+                if batch:
+                    yield batch
+
+    # -- maintenance --
+
+    def compact(self, before: Optional[date] = None) -> int:
+        """Append day segments older than `before` to their monthly segments.
+
+        Each day is sorted on its own and appended, oldest first, so memory
+        follows the size of one day and a run only writes the days it folds;
+        days are disjoint in time, so the month stays sorted. Returns the
+        number of day segments folded away.
+        """
+        for journal in self.directory.glob("clicks-*.seg.fold"):
+            self._recover(journal)
+        before = before or (datetime.utcnow().date() - timedelta(days=self.compact_after_days))
+        folded = 0
+        for start, _, path in self._segments():
+            if len(path.stem) == len("clicks-YYYYMMDD") and start.date() < before:
+                self._fold_day(path, self.directory / f"clicks-{start:%Y%m}.seg")
+                folded += 1
+        return folded
+
+    def _fold_day(self, day_path: Path, target: Path) -> None:
+        """Append one sorted day to `target`, journalled so a crash can be undone.
+
+        The journal holds target's size before the append. It is removed
+        only after the day segment is gone, so while it exists the day has
+        not been folded for good and _recover() truncates the append away.
+        """
+        np = self._np
+        journal = target.with_name(target.name + ".fold")
+        size = target.stat().st_size if target.exists() else 0
+        with open(journal, "w") as f:
+            f.write(f"{size} {day_path.name}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        n = day_path.stat().st_size // RECORD.size  # ignore a torn trailing record
+        day = np.fromfile(day_path, dtype=self._dtype, count=n)
+        day = day[np.argsort(day["ts"], kind="stable")]
+        with open(target, "ab") as f:
+            day.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        day_path.unlink()
+        journal.unlink()
+
+    def _recover(self, journal: Path) -> None:
+        """Finish or roll back a fold interrupted by a crash."""
+        size, day_name = journal.read_text().split()
+        target = journal.with_name(journal.name[: -len(".fold")])
+        if (self.directory / day_name).exists() and target.exists():
+            os.truncate(target, int(size))  # the day is still there: drop the partial append
+        journal.unlink()
+
+
+def compact_segments(directory: str, compact_after_days: int) -> int:
+    """compact() for a fresh log over `directory`; picklable, so it can run in a worker process."""
+    return SegmentClickLog(Path(directory), compact_after_days).compact()
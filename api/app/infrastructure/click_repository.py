@@ -0,0 +1,99 @@
+"""
+Concrete SQLModel implementation of AbstractClickRepository (ClickEvent rows).
+"""
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlmodel import Session, func, select
+
+from app.domain.models import ClickEvent
+from app.domain.repositories import AbstractClickRepository
+
+# Clicks older than this are assumed committed (see count_increment)
+SETTLE_AFTER = timedelta(minutes=5)
+
+
+def _between(query, since: Optional[datetime], until: Optional[datetime]):
+    if since is not None:
+        query = query.where(ClickEvent.created_at >= since)
+    if until is not None:
+        query = query.where(ClickEvent.created_at < until)
+    return query
+
+
+class SqlClickRepository(AbstractClickRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def record(self, item_id: Optional[int]) -> None:
+        self.session.add(ClickEvent(item_id=item_id))
+        self.session.commit()
+
+    def count_per_item(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> dict[Optional[int], int]:
+        query = _between(select(ClickEvent.item_id, func.count()), since, until)
+        return dict(self.session.exec(query.group_by(ClickEvent.item_id)).all())
+
+    def count_increment(
+        self, mark: Optional[int] = None
+    ) -> tuple[dict[Optional[int], int], dict[Optional[int], int], Optional[int], bool]:
+        """Per-item counts of clicks after `mark` (the last settled ClickEvent.id).
+
+        Returns (settled, recent, new mark, is_full). Ids are handed out when
+        an INSERT runs, not when it commits, so rows just below the newest id
+        may still be in flight. Only ids up to the newest row older than
+        SETTLE_AFTER are settled and folded into the mark; everything after
+        it is recounted on every call as `recent`, so a late commit is still
+        seen. is_full is True when `mark` was None and `settled` holds
+        all-time totals rather than a delta.
+        """
+        tail = select(func.max(ClickEvent.id)).where(
+            ClickEvent.created_at < datetime.utcnow() - SETTLE_AFTER
+        )
+        if mark is not None:
+            tail = tail.where(ClickEvent.id > mark)
+        settled_to = self.session.exec(tail).one()
+        if settled_to is None:
+            settled_to = mark
+
+        def counts(query) -> dict[Optional[int], int]:
+            return dict(self.session.exec(query.group_by(ClickEvent.item_id)).all())
+
+        query = select(ClickEvent.item_id, func.count())
+        settled = {}
+        if settled_to != mark:
+            settled = counts(
+                query.where(ClickEvent.id <= settled_to)
+                if mark is None else query.where(ClickEvent.id > mark, ClickEvent.id <= settled_to)
+            )
+        recent = counts(query if settled_to is None else query.where(ClickEvent.id > settled_to))
+        return settled, recent, settled_to, mark is None
+
+    def histogram(
+        self, since: datetime, until: datetime, bucket_seconds: int
+    ) -> list[tuple[datetime, int]]:
+        # Bucketing in SQL is dialect-specific; stream the timestamps instead.
+        # timedelta // timedelta is exact, so edges and indexes agree to the microsecond.
+        bucket = timedelta(seconds=bucket_seconds)
+        n_buckets = max(1, -(-(until - since) // bucket))
+        counts = [0] * n_buckets
+        query = _between(select(ClickEvent.created_at), since, until)
+        for created_at in self.session.exec(query.execution_options(yield_per=10_000)):
+            counts[(created_at - since) // bucket] += 1
+        return [(since + timedelta(seconds=i * bucket_seconds), n) for i, n in enumerate(counts)]
+
+    def iter_events(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        item_ids: Optional[list[int]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[list[tuple[Optional[int], Optional[int], datetime]]]:
+        """Yield (id, item_id, created_at) batches over a server-side cursor."""
+        query = _between(select(ClickEvent.id, ClickEvent.item_id, ClickEvent.created_at), since, until)
+        if item_ids:
+            query = query.where(ClickEvent.item_id.in_(item_ids))
+        query = query.order_by(ClickEvent.id).execution_options(yield_per=batch_size)
+        for batch in self.session.exec(query).partitions():
+            yield [tuple(r) for r in batch]
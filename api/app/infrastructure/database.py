@@ -5,6 +5,8 @@ Change DATABASE_URL in .env to point to Supabase/Postgres for production.
 from sqlmodel import Session, SQLModel, create_engine, text
 
 from app.core.config import settings
+from app.infrastructure.catalogue_version import catalogue_version, ensure_row
+from app.infrastructure.metrics import instrument_engine
 
 connect_args = {}
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -17,6 +19,8 @@ engine = create_engine(
     pool_pre_ping=True,
     pool_recycle=300,
 )
+instrument_engine(engine)
+catalogue_version.bind(engine)
 
 
 # Columns to auto-add if missing (table, column, sql_type_and_default)
@@ -51,6 +55,8 @@ def _run_migrations() -> None:
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
     _run_migrations()
+    with engine.begin() as conn:
+        ensure_row(conn)
 
 
 def get_session():
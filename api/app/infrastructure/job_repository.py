@@ -0,0 +1,134 @@
+"""
+Concrete SQLModel implementation of AbstractJobRepository.
+
+Jobs are claimed with a conditional UPDATE per row (status still claimable,
+checked via rowcount), so several workers can poll the same table without
+dialect-specific locking. A claim is a lease: if its worker dies, the job
+becomes claimable again once locked_until passes.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
+
+from app.domain.models import Job, JobStatus
+from app.domain.repositories import AbstractJobRepository
+
+_MAX_ERROR_CHARS = 2000
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),  # expired lease
+    )
+
+
+class SqlJobRepository(AbstractJobRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(
+        self,
+        name: str,
+        payload: str,
+        run_at: datetime,
+        max_attempts: int,
+        key: Optional[str] = None,
+    ) -> Optional[Job]:
+        """Insert a job; returns None if a job with the same key already exists."""
+        job = Job(name=name, payload=payload, run_at=run_at, max_attempts=max_attempts, key=key)
+        self.session.add(job)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            if key is None:
+                raise
+            return None
+        self.session.refresh(job)
+        return job
+
+    def claim_due(
+        self, names: list[str], now: datetime, lease_until: datetime, limit: int
+    ) -> list[Job]:
+        candidates = self.session.exec(
+            select(Job.id)
+            .where(Job.name.in_(names))
+            .where(_claimable(now))
+            .order_by(Job.run_at)
+            .limit(limit)
+        ).all()
+        claimed = []
+        try:
+            for job_id in candidates:
+                result = self.session.execute(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .where(_claimable(now))
+                    .values(status=JobStatus.RUNNING, locked_until=lease_until, attempts=Job.attempts + 1)
+                )
+                if result.rowcount == 1:  # another worker may have won the row
+                    claimed.append(job_id)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        if not claimed:
+            return []
+        return list(self.session.exec(select(Job).where(Job.id.in_(claimed)).order_by(Job.run_at)).all())
+
+    def _set(self, job_id: int, **values) -> None:
+        self.session.execute(update(Job).where(Job.id == job_id).values(**values))
+        self.session.commit()
+
+    def complete(self, job_id: int) -> None:
+        self._set(job_id, status=JobStatus.DONE, locked_until=None, finished_at=datetime.utcnow())
+
+    def retry(self, job_id: int, run_at: datetime, error: str) -> None:
+        self._set(
+            job_id, status=JobStatus.QUEUED, run_at=run_at, locked_until=None,
+            last_error=error[:_MAX_ERROR_CHARS],
+        )
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._set(
+            job_id, status=JobStatus.FAILED, locked_until=None,
+            last_error=error[:_MAX_ERROR_CHARS], finished_at=datetime.utcnow(),
+        )
+
+    def release(self, job_ids: list[int]) -> None:
+        """Hand claimed-but-unstarted jobs back without using up an attempt."""
+        if not job_ids:
+            return
+        self.session.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids))
+            .where(Job.status == JobStatus.RUNNING)
+            .values(status=JobStatus.QUEUED, locked_until=None, attempts=Job.attempts - 1)
+        )
+        self.session.commit()
+
+    def counts_by_status(self) -> dict[str, int]:
+        rows = self.session.exec(select(Job.status, func.count()).group_by(Job.status)).all()
+        counts = {s.value: 0 for s in JobStatus}
+        counts.update({JobStatus(status).value: n for status, n in rows})
+        return counts
+
+    def oldest_due(self, now: datetime) -> Optional[datetime]:
+        return self.session.exec(
+            select(func.min(Job.run_at))
+            .where(Job.status == JobStatus.QUEUED)
+            .where(Job.run_at <= now)
+        ).one()
+
+    def prune_finished(self, before: datetime) -> int:
+        result = self.session.execute(
+            delete(Job)
+            .where(Job.status.in_([JobStatus.DONE, JobStatus.FAILED]))
+            .where(Job.finished_at < before)
+        )
+        self.session.commit()
+        return result.rowcount
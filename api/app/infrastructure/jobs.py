@@ -0,0 +1,481 @@
+"""
+Infrastructure — in-process background job runner.
+
+Request handlers hand slow work to the runner and return immediately:
+
+  * submit(name, *args) puts work on a bounded in-memory queue. It returns
+    False when the runner is stopped or the queue is full, and the caller
+    then does the work inline (or sheds it). Work still queued or waiting
+    for a retry at shutdown is written to the job table (see stop()); only
+    a crash loses it.
+  * enqueue(name, *args) writes a Job row instead, so the work survives a
+    restart. Every worker polls the table; a claim is a lease, so a job
+    whose worker dies is picked up again once the lease expires.
+  * every(seconds, name) runs a job periodically. With durable=True each
+    period becomes one keyed Job row, so with several workers a periodic
+    job runs once per period rather than once per worker.
+
+Handlers run on a thread pool, or on a process pool when registered with
+cpu=True and JOBS_CPU_WORKERS > 0. Process-pool handlers must be module
+level functions taking picklable arguments. Failed jobs are retried with
+exponential backoff and jitter until max_attempts is reached. Delivery is
+at-least-once (a job cut off by shutdown or an expired lease runs again),
+so handlers should be idempotent.
+
+The runner is started and stopped by the app lifespan. State is per
+process; /api/admin/jobs and /api/metrics expose each worker's numbers.
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.infrastructure.database import engine
+from app.infrastructure.job_repository import SqlJobRepository
+from app.infrastructure.metrics import QUANTILES, registry as metrics_registry
+
+logger = logging.getLogger("mady.jobs")
+
+_WINDOW = 256  # recent samples kept per job name for quantiles
+_CLAIM_BATCH = 50
+
+
+@dataclass
+class _Handler:
+    fn: Callable
+    cpu: bool
+    max_attempts: int
+    on_finished: Optional[Callable] = None  # called with the args once submit()ted work is settled
+
+
+@dataclass
+class _Work:
+    name: str
+    args: tuple
+    job_id: Optional[int] = None  # set for durable jobs
+    attempt: int = 1
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _JobStats:
+    __slots__ = ("succeeded", "failed", "retried", "wait", "run", "last_error")
+
+    def __init__(self) -> None:
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.wait: deque = deque(maxlen=_WINDOW)  # seconds queued before starting
+        self.run: deque = deque(maxlen=_WINDOW)   # seconds spent running
+        self.last_error = ""
+
+
+def _quantiles(samples) -> dict[str, float]:
+    window = sorted(samples)
+    return {
+        f"p{int(q * 100)}": round(window[min(len(window) - 1, int(q * len(window)))], 6) if window else 0.0
+        for q in QUANTILES
+    }
+
+
+class JobRunner:
+    def __init__(
+        self,
+        queue_size: int,
+        concurrency: int,
+        cpu_workers: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        session_factory: Callable[[], Session] = lambda: Session(engine),
+    ):
+        self.queue_size = queue_size
+        self.concurrency = concurrency
+        self.cpu_workers = cpu_workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base_seconds
+        self.retry_max = retry_max_seconds
+        self._session_factory = session_factory
+
+        self._handlers: dict[str, _Handler] = {}
+        self._periodic: list[tuple[str, float, tuple, bool]] = []  # (name, seconds, args, durable)
+        self._lock = threading.Lock()
+        self._pending = 0  # queued in memory, bounded by queue_size
+        self._running_jobs = 0
+        self._periodic_pending: set[str] = set()
+        self._claimed: set[int] = set()  # durable jobs claimed but not finished
+        self._retries: dict[asyncio.TimerHandle, _Work] = {}  # in-memory work waiting out a backoff
+        self._stats: dict[str, _JobStats] = {}
+        self._dropped = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._background: list[asyncio.Task] = []  # poller and schedulers
+        self._wakeup: Optional[asyncio.Event] = None
+        self._threads: Optional[Executor] = None
+        self._processes: Optional[Executor] = None
+
+    # -- registration --
+
+    def register(
+        self,
+        name: str,
+        fn: Callable,
+        *,
+        cpu: bool = False,
+        max_attempts: Optional[int] = None,
+        on_finished: Optional[Callable] = None,
+    ) -> None:
+        """Register a job handler.
+
+        on_finished(*args) runs once for each submit()ted work item when this
+        process is done with it: succeeded, failed for good, dropped, or
+        handed to the job table at shutdown. It is not called for durable jobs.
+        """
+        self._handlers[name] = _Handler(fn, cpu, max_attempts or self.max_attempts, on_finished)
+        self._stats.setdefault(name, _JobStats())
+
+    def every(self, seconds: float, name: str, *args, durable: bool = False) -> None:
+        """Run the registered job `name` on start and then every `seconds`."""
+        self._periodic.append((name, seconds, args, durable))
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    # -- submitting work --
+
+    def submit(self, name: str, *args) -> bool:
+        """Queue in-memory work; safe from any thread. False if stopped or full."""
+        if name not in self._handlers:
+            raise KeyError(f"Unknown job '{name}'")
+        return self._put(_Work(name, args))
+
+    def _put(self, work: _Work) -> bool:
+        loop = self._loop
+        if loop is None:
+            return False
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self._dropped += 1
+                return False
+            self._pending += 1
+        try:
+            loop.call_soon_threadsafe(self._queue.put_nowait, work)
+        except RuntimeError:  # loop closed under us
+            with self._lock:
+                self._pending -= 1
+            return False
+        return True
+
+    def enqueue(self, name: str, *args, delay: float = 0.0, key: Optional[str] = None) -> Optional[int]:
+        """Persist a job row; runs on whichever worker claims it first.
+
+        Returns the job id, or None when `key` is already taken. Works while
+        the runner is stopped: the row simply waits for the next poll.
+        """
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise KeyError(f"Unknown job '{name}'")
+        with self._session_factory() as session:
+            job = SqlJobRepository(session).enqueue(
+                name, json.dumps(args), datetime.utcnow() + timedelta(seconds=delay),
+                handler.max_attempts, key=key,
+            )
+            job_id = job.id if job is not None else None
+        if job_id is not None and self._loop is not None and delay <= 0:
+            self._loop.call_soon_threadsafe(self._wakeup.set)  # don't wait for the next poll
+        return job_id
+
+    # -- lifecycle --
+
+    async def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        if self.cpu_workers > 0:
+            self._processes = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._background = [asyncio.create_task(self._poll())] + [
+            asyncio.create_task(self._schedule(name, seconds, args, durable))
+            for name, seconds, args, durable in self._periodic
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop accepting work, let queued work drain for up to `timeout`, then cancel the rest."""
+        if self._loop is None:
+            return
+        self._loop = None  # submit() now returns False
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Job runner: %d job(s) still queued at shutdown", self._queue.qsize())
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        leftover = []
+        for timer, work in list(self._retries.items()):
+            timer.cancel()
+            leftover.append(work)
+        self._retries.clear()
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        periodic = {name for name, _, _, durable in self._periodic if not durable}
+        spill = [w for w in leftover if w.job_id is None and w.name not in periodic]
+        if spill:
+            # In-memory work must not vanish on a clean shutdown: persist it
+            await asyncio.to_thread(self._spill, spill)
+        with self._lock:
+            unfinished = list(self._claimed)
+            self._claimed.clear()
+            self._pending = 0
+        if unfinished:
+            # Durable work interrupted by shutdown goes back to the table
+            await asyncio.to_thread(self._repo_call, "release", unfinished)
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+        self._workers, self._background = [], []
+
+    # -- internals --
+
+    def _spill(self, work_items: list[_Work]) -> None:
+        for work in work_items:
+            try:
+                self.enqueue(work.name, *work.args)
+            except Exception as e:
+                logger.error("Job runner: lost %s at shutdown: %s", work.name, e)
+            self._finished(work)
+        logger.warning("Job runner: moved %d queued job(s) to the job table", len(work_items))
+
+    def _finished(self, work: _Work) -> None:
+        handler = self._handlers[work.name]
+        if work.job_id is None and handler.on_finished is not None:
+            try:
+                handler.on_finished(*work.args)
+            except Exception:
+                logger.exception("Job runner: on_finished failed for %s", work.name)
+
+    def _repo_call(self, method: str, *args):
+        with self._session_factory() as session:
+            return getattr(SqlJobRepository(session), method)(*args)
+
+    async def _worker(self) -> None:
+        while True:
+            work = await self._queue.get()
+            with self._lock:
+                self._pending -= 1
+                self._running_jobs += 1
+            try:
+                await self._run(work)
+            except Exception:
+                logger.exception("Job runner: bookkeeping failed for %s", work.name)
+            finally:
+                with self._lock:
+                    self._running_jobs -= 1
+                    if work.job_id is not None:
+                        self._claimed.discard(work.job_id)
+                self._queue.task_done()
+
+    async def _run(self, work: _Work) -> None:
+        handler = self._handlers[work.name]
+        stats = self._stats[work.name]
+        started = time.monotonic()
+        stats.wait.append(started - work.enqueued_at)
+        pool = self._processes if handler.cpu and self._processes is not None else self._threads
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, handler.fn, *work.args)
+        except Exception as e:
+            stats.run.append(time.monotonic() - started)
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            stats.last_error = error
+            await self._retry_or_fail(work, handler, error)
+            return
+        finally:
+            self._periodic_pending.discard(work.name)
+        stats.run.append(time.monotonic() - started)
+        stats.succeeded += 1
+        self._finished(work)
+        if work.job_id is not None:
+            await asyncio.to_thread(self._repo_call, "complete", work.job_id)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)  # jitter spreads retries of a shared failure
+
+    async def _retry_or_fail(self, work: _Work, handler: _Handler, error: str) -> None:
+        stats = self._stats[work.name]
+        if work.attempt >= handler.max_attempts:
+            stats.failed += 1
+            logger.error("Job %s failed after %d attempt(s): %s", work.name, work.attempt, error)
+            self._finished(work)
+            if work.job_id is not None:
+                await asyncio.to_thread(self._repo_call, "fail", work.job_id, error)
+            return
+        stats.retried += 1
+        delay = self._backoff(work.attempt)
+        if work.job_id is not None:
+            run_at = datetime.utcnow() + timedelta(seconds=delay)
+            await asyncio.to_thread(self._repo_call, "retry", work.job_id, run_at, error)
+            return
+        retry = _Work(work.name, work.args, attempt=work.attempt + 1)
+        timer = asyncio.get_running_loop().call_later(delay, lambda: self._put_retry(timer))
+        self._retries[timer] = retry
+
+    def _put_retry(self, timer: asyncio.TimerHandle) -> None:
+        work = self._retries.pop(timer, None)
+        if work is None:
+            return
+        work.enqueued_at = time.monotonic()
+        if not self._put(work):
+            self._finished(work)
+            self._stats[work.name].failed += 1
+            logger.error("Job %s dropped: queue full or runner stopped before retry", work.name)
+
+    async def _poll(self) -> None:
+        names = list(self._handlers)
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            with self._lock:
+                room = self.queue_size - self._pending
+            if room <= 0:
+                continue
+            now = datetime.utcnow()
+            try:
+                jobs = await asyncio.to_thread(
+                    self._repo_call, "claim_due", names, now,
+                    now + timedelta(seconds=self.lease_seconds), min(room, _CLAIM_BATCH),
+                )
+            except Exception as e:
+                logger.warning("Job runner: polling failed: %s", e)
+                continue
+            for job in jobs:
+                with self._lock:
+                    self._claimed.add(job.id)
+                    self._pending += 1
+                enqueued = (job.run_at - now).total_seconds() + time.monotonic()
+                self._queue.put_nowait(
+                    _Work(job.name, tuple(json.loads(job.payload)), job.id, job.attempts, enqueued)
+                )
+
+    async def _schedule(self, name: str, seconds: float, args: tuple, durable: bool) -> None:
+        while True:
+            try:
+                if durable:
+                    # One row per period: whichever worker gets there first owns it,
+                    # and a restart inside the period does not run it again
+                    slot = int(time.time() // seconds)
+                    await asyncio.to_thread(self.enqueue, name, *args, key=f"{name}:{slot}")
+                elif name not in self._periodic_pending and self.submit(name, *args):
+                    self._periodic_pending.add(name)  # skip ticks while a run is still pending
+            except Exception as e:
+                logger.warning("Job runner: could not schedule %s: %s", name, e)
+            await asyncio.sleep(seconds)
+
+    # -- reporting --
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pending, running, dropped = self._pending, self._running_jobs, self._dropped
+        return {
+            "running": self.running,
+            "queue": {"depth": pending, "capacity": self.queue_size, "in_progress": running, "rejected": dropped},
+            "workers": {"threads": self.concurrency, "processes": self.cpu_workers},
+            "periodic": [{"name": n, "every_seconds": s, "durable": d} for n, s, _, d in self._periodic],
+            "jobs": {
+                name: {
+                    "succeeded": s.succeeded,
+                    "failed": s.failed,
+                    "retried": s.retried,
+                    "wait_seconds": _quantiles(s.wait),
+                    "run_seconds": _quantiles(s.run),
+                    "last_error": s.last_error,
+                }
+                for name, s in sorted(self._stats.items())
+            },
+        }
+
+    def prometheus_lines(self) -> list[str]:
+        with self._lock:
+            pending, running = self._pending, self._running_jobs
+        lines = [
+            "# HELP mady_jobs_queue_depth In-memory jobs waiting for a worker.",
+            "# TYPE mady_jobs_queue_depth gauge",
+            f"mady_jobs_queue_depth {pending}",
+            "# HELP mady_jobs_in_progress Jobs currently running.",
+            "# TYPE mady_jobs_in_progress gauge",
+            f"mady_jobs_in_progress {running}",
+            "# HELP mady_jobs_total Finished job attempts by outcome.",
+            "# TYPE mady_jobs_total counter",
+        ]
+        stats = sorted(self._stats.items())
+        for name, s in stats:
+            for outcome, n in (("succeeded", s.succeeded), ("failed", s.failed), ("retried", s.retried)):
+                lines.append(f'mady_jobs_total{{job="{name}",outcome="{outcome}"}} {n}')
+        for metric, attr, help_text in (
+            ("mady_job_wait_seconds", "wait", "Time jobs spent queued"),
+            ("mady_job_run_seconds", "run", "Job run time"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}, over the last {_WINDOW} runs.")
+            lines.append(f"# TYPE {metric} summary")
+            for name, s in stats:
+                samples = list(getattr(s, attr))
+                window = sorted(samples)
+                for q in QUANTILES:
+                    value = window[min(len(window) - 1, int(q * len(window)))] if window else 0.0
+                    lines.append(f'{metric}{{job="{name}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'{metric}_sum{{job="{name}"}} {sum(samples):.6f}')
+                lines.append(f'{metric}_count{{job="{name}"}} {len(samples)}')
+        return lines
+
+    def durable_snapshot(self) -> dict:
+        """Job-table counts shared by all workers (queries the DB)."""
+        now = datetime.utcnow()
+        with self._session_factory() as session:
+            repo = SqlJobRepository(session)
+            counts = repo.counts_by_status()
+            oldest = repo.oldest_due(now)
+        return {
+            "counts": counts,
+            "oldest_due_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        }
+
+
+jobs = JobRunner(
+    queue_size=settings.JOBS_QUEUE_SIZE,
+    concurrency=settings.JOBS_CONCURRENCY,
+    cpu_workers=settings.JOBS_CPU_WORKERS,
+    poll_seconds=settings.JOBS_POLL_SECONDS,
+    lease_seconds=settings.JOBS_LEASE_SECONDS,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    retry_base_seconds=settings.JOBS_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.JOBS_RETRY_MAX_SECONDS,
+)
+metrics_registry.register_collector(jobs.prometheus_lines)
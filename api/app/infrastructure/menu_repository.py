@@ -4,6 +4,7 @@ Swap this class to change the persistence layer without touching service/domain
 """
 from typing import Optional
 
+from sqlalchemy import update
 from sqlmodel import Session, select
 
 from app.domain.models import Category, MenuItem
@@ -40,6 +41,71 @@ class SqlMenuRepository(AbstractMenuRepository):
         self.session.refresh(item)
         return item
 
+    def bulk_update_menu_items(self, patches: list[dict]) -> list[dict]:
+        """Apply partial updates to many items in one transaction.
+
+        Items receiving the exact same changes (e.g. a batch of
+        is_available=False toggles) share a single UPDATE ... WHERE id IN;
+        the remaining per-item changes go out as one executemany by primary key.
+        Items pointing at a category that does not exist are left untouched
+        and reported as "invalid_category".
+        """
+        # Merge duplicate ids so the last patch for an item wins
+        merged: dict[int, dict] = {}
+        for patch in patches:
+            merged.setdefault(patch["id"], {}).update(patch.get("fields") or {})
+
+        existing = set(self.session.exec(
+            select(MenuItem.id).where(MenuItem.id.in_(list(merged)))
+        ).all())
+
+        wanted = {f["category_id"] for f in merged.values() if f.get("category_id") is not None}
+        categories = set(self.session.exec(
+            select(Category.id).where(Category.id.in_(list(wanted)))
+        ).all()) if wanted else set()
+        bad_category = {
+            item_id for item_id, fields in merged.items()
+            if fields.get("category_id") is not None and fields["category_id"] not in categories
+        }
+
+        groups: dict[tuple, list[int]] = {}
+        for item_id, fields in merged.items():
+            if item_id in existing and fields and item_id not in bad_category:
+                groups.setdefault(tuple(sorted(fields.items())), []).append(item_id)
+
+        try:
+            singles = []
+            for assignment, ids in groups.items():
+                if len(ids) > 1:
+                    self.session.execute(
+                        update(MenuItem)
+                        .where(MenuItem.id.in_(ids))
+                        .values(**dict(assignment))
+                        .execution_options(synchronize_session=False)
+                    )
+                else:
+                    singles.append({"id": ids[0], **dict(assignment)})
+            if singles:
+                self.session.execute(update(MenuItem), singles)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        results = []
+        for patch in patches:
+            item_id = patch["id"]
+            if item_id not in existing:
+                status = "not_found"
+            elif item_id in bad_category:
+                status = "invalid_category"
+            elif not merged[item_id]:
+                status = "unchanged"
+            else:
+                status = "updated"
+            results.append({"id": item_id, "status": status})
+        return results
+
     def delete_menu_item(self, item_id: int) -> bool:
         item = self.session.get(MenuItem, item_id)
         if not item:
@@ -0,0 +1,313 @@
+"""
+Infrastructure — in-process request and database instrumentation.
+
+Per-route latency, counts, in-flight requests and per-request SQL activity
+are collected here and rendered in Prometheus text format by /api/metrics.
+State is per process; each worker exposes its own numbers.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("mady.metrics")
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+_WINDOW = 1024  # recent samples kept per route for quantiles
+_SLOW_LOG_SIZE = 100
+_SLOW_LOG_PARAM_SETS = 3      # parameter sets kept from an executemany
+_SLOW_LOG_MAX_CHARS = 1000    # per statement / parameters text
+_POOL_WAIT_STALE_SECONDS = 5.0  # recent_pool_wait() reports 0 after this long without checkouts
+
+
+class _RequestStats:
+    """Mutable per-request accumulator shared with threadpool workers via a ContextVar."""
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_time = 0.0
+
+
+_current: ContextVar[Optional[_RequestStats]] = ContextVar("mady_request_stats", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class _RouteStats:
+    __slots__ = ("latency", "recent", "statuses", "errors", "statements", "db_time")
+
+    def __init__(self) -> None:
+        self.latency = _Histogram()
+        self.recent: deque = deque(maxlen=_WINDOW)
+        self.statuses: dict[int, int] = {}
+        self.errors = 0
+        self.statements = 0
+        self.db_time = 0.0
+
+
+def _clip(text: str) -> str:
+    if len(text) <= _SLOW_LOG_MAX_CHARS:
+        return text
+    return f"{text[:_SLOW_LOG_MAX_CHARS]}... ({len(text)} chars)"
+
+
+class MetricsRegistry:
+    def __init__(self, slow_query_seconds: float = 0.2) -> None:
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], _RouteStats] = {}
+        self._pool_wait = _Histogram()
+        self._slow_queries: deque = deque(maxlen=_SLOW_LOG_SIZE)
+        self._slow_total = 0
+        self._in_flight = 0
+        self._engine = None
+        self._pool_wait_ewma = 0.0
+        self._pool_wait_at = 0.0
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    # -- recording --
+
+    def _route(self, key: tuple[str, str]) -> _RouteStats:
+        stats = self._routes.get(key)
+        if stats is None:
+            stats = self._routes[key] = _RouteStats()
+        return stats
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(
+        self, key: tuple[str, str], status: int, elapsed: float, stats: _RequestStats,
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            route = self._route(key)
+            route.latency.observe(elapsed)
+            route.recent.append(elapsed)
+            route.statuses[status] = route.statuses.get(status, 0) + 1
+            if status >= 500:
+                route.errors += 1
+            route.statements += stats.statements
+            route.db_time += stats.db_time
+
+    def pool_checkout(self, elapsed: float) -> None:
+        with self._lock:
+            self._pool_wait.observe(elapsed)
+            self._pool_wait_ewma = 0.8 * self._pool_wait_ewma + 0.2 * elapsed
+            self._pool_wait_at = time.monotonic()
+
+    def recent_pool_wait(self) -> float:
+        """Smoothed connection checkout time in seconds, 0 when there has been no recent checkout."""
+        if time.monotonic() - self._pool_wait_at > _POOL_WAIT_STALE_SECONDS:
+            return 0.0
+        return self._pool_wait_ewma
+
+    def register_collector(self, collector: Callable[[], list[str]]) -> None:
+        """Add a callable returning extra Prometheus lines to every scrape."""
+        self._collectors.append(collector)
+
+    def slow_query(self, statement: str, parameters, elapsed: float, executemany: bool = False) -> None:
+        if executemany and len(parameters) > _SLOW_LOG_PARAM_SETS:
+            params = f"{parameters[:_SLOW_LOG_PARAM_SETS]!r} ... ({len(parameters)} parameter sets)"
+        else:
+            params = repr(parameters)
+        statement, params = _clip(statement), _clip(params)
+        entry = {
+            "statement": statement,
+            "parameters": params,
+            "duration_ms": round(elapsed * 1000, 2),
+            "at": time.time(),
+        }
+        with self._lock:
+            self._slow_queries.append(entry)
+            self._slow_total += 1
+        logger.warning("Slow query (%.1f ms): %s %s", elapsed * 1000, statement, params)
+
+    def slow_queries(self) -> list[dict]:
+        with self._lock:
+            return list(self._slow_queries)
+
+    # -- exposition --
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+            def family(name: str, kind: str, help_text: str) -> None:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+            family("mady_http_requests_total", "counter", "HTTP requests by route and status.")
+            for (method, path), s in routes:
+                for status, n in sorted(s.statuses.items()):
+                    lines.append(
+                        f'mady_http_requests_total{{method="{method}",route="{path}",status="{status}"}} {n}'
+                    )
+
+            family("mady_http_request_errors_total", "counter", "HTTP requests answered with a 5xx status.")
+            for (method, path), s in routes:
+                lines.append(f'mady_http_request_errors_total{{method="{method}",route="{path}"}} {s.errors}')
+
+            family("mady_http_requests_in_flight", "gauge", "Requests currently being served.")
+            lines.append(f"mady_http_requests_in_flight {self._in_flight}")
+
+            family("mady_http_request_duration_seconds", "histogram", "Request latency.")
+            for (method, path), s in routes:
+                _render_histogram(lines, "mady_http_request_duration_seconds", s.latency,
+                                  f'method="{method}",route="{path}"')
+
+            family("mady_http_request_latency_seconds", "summary",
+                   f"Request latency quantiles over the last {_WINDOW} requests.")
+            for (method, path), s in routes:
+                labels = f'method="{method}",route="{path}"'
+                window = sorted(s.recent)
+                for q in QUANTILES:
+                    value = window[min(len(window) - 1, int(q * len(window)))] if window else 0.0
+                    lines.append(f'mady_http_request_latency_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+                lines.append(f"mady_http_request_latency_seconds_sum{{{labels}}} {s.latency.total:.6f}")
+                lines.append(f"mady_http_request_latency_seconds_count{{{labels}}} {s.latency.count}")
+
+            family("mady_db_statements_total", "counter", "SQL statements executed while serving requests.")
+            for (method, path), s in routes:
+                lines.append(f'mady_db_statements_total{{method="{method}",route="{path}"}} {s.statements}')
+
+            family("mady_db_time_seconds_total", "counter", "Time spent in SQL while serving requests.")
+            for (method, path), s in routes:
+                lines.append(f'mady_db_time_seconds_total{{method="{method}",route="{path}"}} {s.db_time:.6f}')
+
+            family("mady_db_pool_checkout_seconds", "histogram", "Time waiting for a pooled DB connection.")
+            _render_histogram(lines, "mady_db_pool_checkout_seconds", self._pool_wait, "")
+
+            family("mady_db_slow_queries_total", "counter",
+                   f"Statements slower than {self.slow_query_seconds * 1000:g} ms.")
+            lines.append(f"mady_db_slow_queries_total {self._slow_total}")
+
+        pool = getattr(self._engine, "pool", None)
+        if pool is not None and hasattr(pool, "checkedout"):
+            lines.append("# HELP mady_db_pool_checked_out Connections currently checked out.")
+            lines.append("# TYPE mady_db_pool_checked_out gauge")
+            lines.append(f"mady_db_pool_checked_out {pool.checkedout()}")
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(lines: list[str], name: str, h: _Histogram, labels: str) -> None:
+    prefix = f"{labels}," if labels else ""
+    cumulative = 0
+    for bound, n in zip(LATENCY_BUCKETS, h.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {h.count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {h.total:.6f}")
+    lines.append(f"{name}_count{suffix} {h.count}")
+
+
+registry = MetricsRegistry(slow_query_seconds=settings.SLOW_QUERY_MS / 1000)
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy hooks
+# ---------------------------------------------------------------------------
+
+def instrument_engine(engine) -> None:
+    """Attach statement timing and pool checkout timing to an engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the per-statement context: after_cursor_execute does not fire
+        # when a statement raises, so per-connection state would go stale
+        if context is not None:
+            context._mady_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_mady_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+        if elapsed >= registry.slow_query_seconds:
+            registry.slow_query(statement, parameters, elapsed, executemany)
+
+    # The pool has no "before checkout" event, so time the call the engine
+    # makes to obtain a DBAPI connection (pool wait + pre-ping + connect).
+    raw_connection = engine.raw_connection
+
+    def _timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            registry.pool_checkout(time.perf_counter() - start)
+
+    engine.raw_connection = _timed_raw_connection
+    registry._engine = engine
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware — avoids BaseHTTPMiddleware's per-request overhead."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        status = 500
+        registry.request_started()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The router stores the matched route in the shared scope; label by
+            # its template so /api/menu/1 and /api/menu/2 share one series.
+            path = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            registry.request_finished((scope["method"], path), status, elapsed, stats)
+            _current.reset(token)
@@ -0,0 +1,48 @@
+"""
+Concrete SQLModel implementation of AbstractPopularityRepository.
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+
+from app.domain.models import ItemPopularity
+from app.domain.repositories import AbstractPopularityRepository
+
+
+class SqlPopularityRepository(AbstractPopularityRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def load_since(self, since: datetime) -> list[tuple[int, datetime, int]]:
+        rows = self.session.exec(
+            select(ItemPopularity.item_id, ItemPopularity.bucket_start, ItemPopularity.clicks)
+            .where(ItemPopularity.bucket_start >= since)
+        ).all()
+        return [tuple(r) for r in rows]
+
+    def add_counts(self, rows: list[tuple[int, datetime, int]]) -> None:
+        """Add click deltas to stored buckets. Additive, so several workers can checkpoint safely."""
+        try:
+            for item_id, bucket_start, delta in rows:
+                result = self.session.execute(
+                    update(ItemPopularity)
+                    .where(ItemPopularity.item_id == item_id)
+                    .where(ItemPopularity.bucket_start == bucket_start)
+                    .values(clicks=ItemPopularity.clicks + delta)
+                )
+                if result.rowcount == 0:
+                    self.session.add(
+                        ItemPopularity(item_id=item_id, bucket_start=bucket_start, clicks=delta)
+                    )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def prune_before(self, cutoff: datetime) -> int:
+        result = self.session.execute(
+            delete(ItemPopularity).where(ItemPopularity.bucket_start < cutoff)
+        )
+        self.session.commit()
+        return result.rowcount
@@ -0,0 +1,149 @@
+"""
+Infrastructure — static file serving with cached metadata, precompressed
+variants and long-lived caching for content-addressed files.
+
+CachedStaticFiles is a drop-in StaticFiles that
+
+  - keeps each file's stat result (and its .br/.gz siblings) in memory, so
+    hot assets are not re-stat'ed on every request. Content-addressed files
+    are cached until evicted; anything else is re-checked after
+    metadata_ttl seconds so edits in development still show up;
+  - sends file.br / file.gz instead of file when the client accepts that
+    encoding and the sibling is at least as new (see build_frontend.py);
+  - marks fingerprinted assets (name.<hex hash>.js) and every file of an
+    `immutable` mount as cacheable for a year. Everything else, HTML
+    included, gets `no-cache` and is revalidated with its ETag.
+"""
+import mimetypes
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+FINGERPRINT = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preference order
+
+
+class _Meta(NamedTuple):
+    full_path: str
+    stat_result: os.stat_result
+    variants: dict[str, tuple[str, os.stat_result]]  # encoding -> (path, stat)
+    expires: Optional[float]  # monotonic deadline; None = until evicted
+
+
+def _accepted(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        q = params.strip().lower()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(
+        self,
+        *args,
+        immutable: bool = False,
+        metadata_ttl: float = 2.0,
+        max_entries: int = 4096,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.immutable = immutable
+        self.metadata_ttl = metadata_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._meta: "OrderedDict[str, _Meta]" = OrderedDict()
+        self._by_full_path: dict[str, _Meta] = {}
+
+    def is_immutable(self, path: str) -> bool:
+        return self.immutable or bool(FINGERPRINT.search(path))
+
+    def lookup_path(self, path: str) -> tuple[str, Optional[os.stat_result]]:
+        now = time.monotonic()
+        with self._lock:
+            meta = self._meta.get(path)
+            if meta is not None and (meta.expires is None or meta.expires > now):
+                self._meta.move_to_end(path)
+                return meta.full_path, meta.stat_result
+
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return full_path, stat_result  # misses and directories are not cached
+
+        variants = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                sibling = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(sibling.st_mode) and sibling.st_mtime >= stat_result.st_mtime:
+                variants[encoding] = (full_path + suffix, sibling)
+
+        meta = _Meta(
+            full_path, stat_result, variants,
+            None if self.is_immutable(path) else now + self.metadata_ttl,
+        )
+        with self._lock:
+            self._meta[path] = meta
+            self._meta.move_to_end(path)
+            self._by_full_path[full_path] = meta
+            while len(self._meta) > self.max_entries:
+                _, evicted = self._meta.popitem(last=False)
+                if self._by_full_path.get(evicted.full_path) is evicted:
+                    del self._by_full_path[evicted.full_path]
+        return full_path, stat_result
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        meta = self._by_full_path.get(str(full_path))
+        variants = meta.variants if meta is not None else {}
+
+        response = None
+        if variants:
+            accepted = _accepted(request_headers.get("accept-encoding", ""))
+            for encoding, _ in ENCODINGS:
+                if encoding in variants and encoding in accepted:
+                    variant_path, variant_stat = variants[encoding]
+                    response = FileResponse(
+                        variant_path,
+                        status_code=status_code,
+                        stat_result=variant_stat,
+                        # Type of the original, not of the .br/.gz file
+                        media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                    )
+                    response.headers["content-encoding"] = encoding
+                    break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        if variants:
+            response.headers["vary"] = "Accept-Encoding"
+        path = scope.get("path", "")
+        response.headers["cache-control"] = IMMUTABLE if self.is_immutable(path) else REVALIDATE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
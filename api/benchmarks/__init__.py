@@ -0,0 +1,22 @@
+"""
+Benchmarks — synthetic data generation and load scenarios for the API.
+
+    python -m benchmarks.generate --database-url sqlite:///bench.db --items 10000
+    python -m benchmarks.run --database-url sqlite:///bench.db --mode both
+
+Run from the 'api' folder. Results are written as JSON under
+benchmarks/results/ so runs can be compared across commits (--compare).
+"""
+import os
+import sys
+
+# Make 'from app...' / 'import index' work regardless of the working directory
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+def configure_database(database_url: str) -> None:
+    """Point the app at the benchmark database. Must run before importing 'app'."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("DEBUG", "False")  # SQL echo would dominate timings
@@ -0,0 +1,100 @@
+"""
+Multi-process cache coherence check — measures how long it takes for an
+admin edit committed by one process to reach the menu caches of others.
+
+    python -m benchmarks.coherence --database-url sqlite:////tmp/coherence.db --workers 4
+
+Each reader process serves /api/menu from its catalogue cache in a tight
+loop; the writer changes a price through the repository. The observed
+delay per reader must stay within CATALOGUE_VERSION_CHECK_SECONDS.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+from benchmarks import configure_database
+
+
+def _reader(database_url: str, item_id: int, expected_price: float, ready, start_at, results) -> None:
+    configure_database(database_url)
+    from sqlmodel import Session
+
+    from app.application.menu_service import MenuService
+    from app.infrastructure.catalogue_version import catalogue_cache
+    from app.infrastructure.database import engine
+    from app.infrastructure.menu_repository import SqlMenuRepository
+
+    def price_from_cache() -> float:
+        def load():
+            with Session(engine) as session:
+                items = MenuService(SqlMenuRepository(session)).get_menu_items()
+                return {i.id: i.price for i in items}
+        return catalogue_cache.get_or_load(("menu", None), load)[item_id]
+
+    price_from_cache()  # warm the cache
+    ready.release()
+    while True:
+        if price_from_cache() == expected_price:
+            results.put((os.getpid(), time.time() - start_at.value))
+            return
+        time.sleep(0.005)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--check-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    os.environ["CATALOGUE_VERSION_CHECK_SECONDS"] = str(args.check_seconds)
+    configure_database(args.database_url)
+    import index  # noqa: F401 — registers all tables
+    from sqlmodel import Session
+
+    from app.application.menu_service import MenuService
+    from app.infrastructure.database import create_db_and_tables, engine
+    from app.infrastructure.menu_repository import SqlMenuRepository
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        index.seed_database(session)
+        item = MenuService(SqlMenuRepository(session)).get_menu_items()[0]
+        item_id, new_price = item.id, round(item.price + 1.0, 2)
+
+    ctx = mp.get_context("spawn")
+    ready = ctx.Semaphore(0)
+    start_at = ctx.Value("d", 0.0)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_reader, args=(args.database_url, item_id, new_price, ready, start_at, results))
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+
+    start_at.value = time.time()
+    with Session(engine) as session:
+        MenuService(SqlMenuRepository(session)).bulk_update_items(
+            [{"id": item_id, "fields": {"price": new_price}}]
+        )
+    print(f"Committed price change for item {item_id}; waiting for {args.workers} readers...")
+
+    delays = [results.get(timeout=args.check_seconds * 10 + 30) for _ in procs]
+    for p in procs:
+        p.join()
+    for pid, delay in sorted(delays, key=lambda d: d[1]):
+        print(f"  pid {pid}: saw the edit after {delay * 1000:.0f} ms")
+    worst = max(d for _, d in delays)
+    bound = args.check_seconds + 0.5  # interval plus scheduling slack
+    print(f"Worst delay {worst * 1000:.0f} ms (bound {bound * 1000:.0f} ms)")
+    if worst > bound:
+        raise SystemExit("FAIL: a worker served stale menu data past the coherence bound")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
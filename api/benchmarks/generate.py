@@ -0,0 +1,183 @@
+"""
+Synthetic data generator — bulk-loads categories, menu items, click events
+and orders at configurable volumes.
+
+Rows are produced deterministically from --seed and written in chunks:
+COPY FROM STDIN on Postgres, a single executemany per chunk elsewhere.
+"""
+import argparse
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import configure_database
+
+CHUNK = 50_000
+ICONS = ["lunch_dining", "fastfood", "local_drink", "icecream", "local_pizza", "ramen_dining"]
+
+
+def _max_id(conn, table) -> int:
+    from sqlalchemy import func, select
+    return conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+
+
+def _copy_rows(conn, table, columns: list[str], rows: list[tuple]) -> None:
+    """Postgres fast path: stream one chunk through COPY FROM STDIN."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["\\N" if v is None else v for v in row])
+    buf.seek(0)
+    cols = ", ".join(columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    cursor.copy_expert(
+        f'COPY "{table.name}" ({cols}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buf
+    )
+
+
+def _load(conn, table, columns: list[str], rows_iter, total: int, label: str) -> None:
+    is_postgres = conn.dialect.name == "postgresql"
+    stmt = table.insert()
+    start = time.perf_counter()
+    done = 0
+    chunk: list[tuple] = []
+
+    def flush():
+        nonlocal done
+        if is_postgres:
+            _copy_rows(conn, table, columns, chunk)
+        else:
+            conn.execute(stmt, [dict(zip(columns, row)) for row in chunk])
+        conn.commit()
+        done += len(chunk)
+        chunk.clear()
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(f"  {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)", end="\r", flush=True)
+
+    for row in rows_iter:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            flush()
+    if chunk:
+        flush()
+    print(f"  {label}: {done:,} rows in {time.perf_counter() - start:.1f}s" + " " * 20)
+
+    if is_postgres:
+        from sqlalchemy import text
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM \"{table.name}\"))"
+        ))
+        conn.commit()
+
+
+def generate(
+    categories: int, items: int, clicks: int, orders: int,
+    days: int = 30, seed: int = 42,
+) -> None:
+    from app.domain.models import Category, ClickEvent, MenuItem, Order, OrderItem, OrderStatus
+    from app.infrastructure.database import create_db_and_tables, engine
+
+    create_db_and_tables()
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    span = days * 86400
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            from sqlalchemy import text
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+            conn.execute(text("PRAGMA synchronous=OFF"))
+
+        cat_table = Category.__table__
+        first_cat = _max_id(conn, cat_table) + 1
+        cat_ids = list(range(first_cat, first_cat + categories))
+        _load(conn, cat_table, ["id", "name", "icon", "display_order"], (
+            (cid, f"Category {cid}", rng.choice(ICONS), i)
+            for i, cid in enumerate(cat_ids)
+        ), categories, "categories")
+
+        item_table = MenuItem.__table__
+        first_item = _max_id(conn, item_table) + 1
+        item_ids = list(range(first_item, first_item + items))
+        prices: dict[int, float] = {}
+
+        def item_rows():
+            for iid in item_ids:
+                price = round(rng.uniform(2, 30), 2)
+                prices[iid] = price
+                yield (
+                    iid, f"Item {iid}", "Synthetic benchmark item.", price, "",
+                    round(rng.uniform(3.5, 5.0), 1), rng.random() > 0.05, rng.random() < 0.1,
+                    rng.choice(cat_ids) if cat_ids else None, "",
+                )
+
+        _load(conn, item_table, [
+            "id", "name", "description", "price", "image_url", "rating",
+            "is_available", "is_featured", "category_id", "foodpanda_url",
+        ], item_rows(), items, "menu items")
+
+        # Skewed popularity: a few items attract most clicks, ~10% are shop clicks
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(item_ids))))
+
+        def click_rows():
+            remaining = clicks
+            while remaining:
+                n = min(CHUNK, remaining)
+                picks = rng.choices(item_ids, cum_weights=cum_weights, k=n) if item_ids else [None] * n
+                for item_id in picks:
+                    ts = now - timedelta(seconds=rng.randrange(span))
+                    yield (None if rng.random() < 0.1 else item_id, ts)
+                remaining -= n
+
+        _load(conn, ClickEvent.__table__, ["item_id", "created_at"],
+              click_rows(), clicks, "click events")
+
+        order_table = Order.__table__
+        first_order = _max_id(conn, order_table) + 1
+        order_ids = range(first_order, first_order + orders)
+        # Enum columns store member names; COPY bypasses SQLAlchemy's value -> name mapping
+        statuses = [s.name for s in OrderStatus]
+
+        def order_lines(oid: int) -> list[tuple]:
+            # Seeded per order so both passes see the same lines without holding them
+            r = random.Random(seed * 1_000_003 + oid)
+            picked = r.sample(item_ids, k=min(len(item_ids), r.randint(1, 3)))
+            return [(oid, iid, r.randint(1, 3), prices[iid]) for iid in picked]
+
+        def order_rows():
+            for oid in order_ids:
+                total = sum(qty * price for _, _, qty, price in order_lines(oid))
+                yield (
+                    oid, f"Customer {oid}", "", "", rng.choice(statuses), round(total, 2),
+                    now - timedelta(seconds=rng.randrange(span)), "",
+                )
+
+        _load(conn, order_table, [
+            "id", "customer_name", "customer_phone", "delivery_address",
+            "status", "total_amount", "created_at", "notes",
+        ], order_rows(), orders, "orders")
+        _load(conn, OrderItem.__table__, ["order_id", "menu_item_id", "quantity", "unit_price"],
+              (line for oid in order_ids for line in order_lines(oid)), orders * 2, "order items")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--clicks", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30, help="spread timestamps over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    configure_database(args.database_url)
+    generate(args.categories, args.items, args.clicks, args.orders, args.days, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Scenario runner — drives the API with concurrent async clients and reports
+throughput and latency percentiles per endpoint.
+
+Modes:
+  inprocess  httpx over ASGITransport, no network (measures app + DB cost)
+  uvicorn    a local uvicorn subprocess over TCP (adds server/HTTP overhead)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import API_DIR, configure_database
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Smallest valid PNG (1x1, transparent) — keeps upload cost about the request path
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+def _menu(client, rng):
+    return client.get("/api/menu")
+
+
+def _track(client, rng):
+    # Spread clicks over many synthetic clients so per-IP admission limits don't dominate
+    ip = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+    return client.post(
+        "/api/analytics/track", json={"item_id": rng.randint(1, 50)},
+        headers={"X-Forwarded-For": ip},
+    )
+
+
+def _clicks(client, rng):
+    return client.get("/api/analytics/clicks")
+
+
+def _upload(client, rng):
+    return client.post("/api/upload", files={"file": ("bench.png", _PNG, "image/png")})
+
+
+SCENARIOS = {
+    "menu": ("GET /api/menu", _menu),
+    "track": ("POST /api/analytics/track", _track),
+    "clicks": ("GET /api/analytics/clicks", _clicks),
+    "upload": ("POST /api/upload", _upload),
+}
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def _run_scenario(client, fn, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        await fn(client, rng)
+
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                r = await fn(client, rng)
+                ok = r.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def _run_all(client, args) -> dict:
+    results = {}
+    for name in args.scenarios:
+        label, fn = SCENARIOS[name]
+        stats = await _run_scenario(client, fn, args.requests, args.concurrency, args.warmup, args.seed)
+        results[name] = {"endpoint": label, **stats}
+        print(f"  {label:<28} {stats['throughput_rps']:>9.1f} req/s  "
+              f"p50 {stats['p50_ms']:.2f}  p95 {stats['p95_ms']:.2f}  p99 {stats['p99_ms']:.2f} ms"
+              f"  errors {stats['errors']}")
+    return results
+
+
+async def run_inprocess(args, upload_dir: str) -> dict:
+    import httpx
+    import index
+
+    index.UPLOAD_DIR = Path(upload_dir)
+    async with index.app.router.lifespan_context(index.app):
+        transport = httpx.ASGITransport(app=index.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _run_all(client, args)
+
+
+async def run_uvicorn(args, upload_dir: str) -> dict:
+    import httpx
+
+    env = {**os.environ, "BENCH_UPLOAD_DIR": upload_dir}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.run", "--serve", str(args.port),
+         "--database-url", args.database_url],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/api/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError("uvicorn did not come up")
+                await asyncio.sleep(0.2)
+            return await _run_all(client, args)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _serve(port: int) -> None:
+    """Child-process entry point for --mode uvicorn."""
+    import uvicorn
+    import index
+
+    index.UPLOAD_DIR = Path(os.environ["BENCH_UPLOAD_DIR"])
+    uvicorn.run(index.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def _compare(current: dict, baseline_path: str) -> None:
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    for mode, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            old = baseline.get("results", {}).get(mode, {}).get(name)
+            if not old:
+                continue
+            deltas = []
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                if old[key]:
+                    deltas.append(f"{key} {(stats[key] - old[key]) / old[key] * 100:+.1f}%")
+            print(f"  [{mode}] {stats['endpoint']:<28} " + "  ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="inprocess")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="previous result file to diff against")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    configure_database(args.database_url)
+    # Never push benchmark uploads to real object storage
+    os.environ.pop("SUPABASE_URL", None)
+    os.environ.pop("SUPABASE_SERVICE_KEY", None)
+    os.environ["TRUST_PROXY_HEADERS"] = "True"  # lets the track scenario vary client IPs
+
+    if args.serve:
+        _serve(args.serve)
+        return
+
+    commit = _git_commit()
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="mady-bench-uploads-") as upload_dir:
+        for mode in modes:
+            print(f"[{mode}] {args.requests} requests x {len(args.scenarios)} scenarios, "
+                  f"concurrency {args.concurrency}")
+            runner = run_inprocess if mode == "inprocess" else run_uvicorn
+            results[mode] = asyncio.run(runner(args, upload_dir))
+
+    report = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": sys.version.split()[0],
+        "config": {
+            "database": args.database_url.split("@")[-1],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "scenarios": args.scenarios,
+        },
+        "results": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"{datetime.utcnow():%Y%m%dT%H%M%S}-{commit}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        _compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
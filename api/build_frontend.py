@@ -0,0 +1,158 @@
+"""
+Frontend build — fingerprints JS/CSS and precompresses text assets.
+
+    python build_frontend.py            # frontend/ -> frontend_dist/
+
+Copies the frontend tree, writes a content-hashed copy of every JS/CSS file
+(js/api.js -> js/api.3f9c0a1b2d.js) and rewrites references to them in HTML
+pages, in module imports and in sw.js, so pages always load the build they
+were written against and the hashed files can be cached forever. Text
+assets get .gz (and .br, when the brotli package is installed) siblings
+that the API's static file server sends to clients that accept them.
+
+Vercel runs this as the project's buildCommand and serves frontend_dist/
+(see vercel.json). Locally, the server serves frontend_dist/ instead of
+frontend/ once it has been built.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FINGERPRINTED = {".js", ".css"}
+COMPRESSIBLE = {".html", ".js", ".css", ".svg", ".json", ".txt", ".xml", ".webmanifest"}
+UNHASHED = {"sw.js"}  # must keep a stable URL
+MIN_COMPRESS_BYTES = 256
+HASH_LENGTH = 10
+
+# Quoted relative or root-relative .js/.css specifiers, e.g. './api.js', "/js/menu.js"
+_SPECIFIER = re.compile(r"""(["'])((?![a-z]+:|//)[^"'\s?#]+\.(?:js|css))\1""")
+_SHELL_VERSION = re.compile(r"""(const SHELL_VERSION\s*=\s*)(["'])[^"']*\2""")
+
+
+def _resolve(url_path: str, specifier: str) -> str:
+    """URL path ("/js/api.js") a specifier in the file at url_path points to."""
+    if specifier.startswith("/"):
+        return posixpath.normpath(specifier)
+    return posixpath.normpath(posixpath.join(posixpath.dirname(url_path), specifier))
+
+
+def _rewrite(url_path: str, text: str, manifest: dict[str, str]) -> str:
+    def replace(m: re.Match) -> str:
+        quote, spec = m.groups()
+        hashed = manifest.get(_resolve(url_path, spec))
+        if hashed is None:
+            return m.group(0)
+        return f"{quote}{posixpath.join(posixpath.dirname(spec), posixpath.basename(hashed))}{quote}"
+
+    return _SPECIFIER.sub(replace, text)
+
+
+def _dependencies(url_path: str, text: str, assets: set[str]) -> set[str]:
+    return {
+        target for _, spec in _SPECIFIER.findall(text)
+        if (target := _resolve(url_path, spec)) in assets and target != url_path
+    }
+
+
+def fingerprint(out_dir: Path) -> dict[str, str]:
+    """Write hashed copies of JS/CSS under out_dir; returns {url: hashed url}.
+
+    Files are hashed after their own imports are rewritten, so a change in a
+    dependency also changes the name of every module importing it.
+    """
+    sources = {
+        "/" + p.relative_to(out_dir).as_posix(): p
+        for p in out_dir.rglob("*")
+        if p.is_file() and p.suffix in FINGERPRINTED and p.name not in UNHASHED
+    }
+    texts = {url: path.read_text(encoding="utf-8") for url, path in sources.items()}
+    deps = {url: _dependencies(url, text, set(sources)) for url, text in texts.items()}
+    manifest: dict[str, str] = {}
+
+    def visit(url: str, stack: tuple[str, ...] = ()) -> None:
+        if url in manifest:
+            return
+        for dep in sorted(deps[url]):
+            if dep not in stack:  # import cycles: hash against the unrewritten name
+                visit(dep, stack + (url,))
+        text = _rewrite(url, texts[url], manifest)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+        path = sources[url]
+        hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}")
+        hashed.write_text(text, encoding="utf-8")
+        manifest[url] = "/" + hashed.relative_to(out_dir).as_posix()
+
+    for url in sorted(sources):
+        visit(url)
+    return manifest
+
+
+def rewrite_references(out_dir: Path, manifest: dict[str, str]) -> None:
+    """Point HTML pages, unhashed scripts and sw.js at the hashed files."""
+    hashed = {out_dir / url.lstrip("/") for url in manifest.values()}
+    build_id = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:HASH_LENGTH]
+    for path in out_dir.rglob("*"):
+        if not path.is_file() or path in hashed or path.suffix not in {".html", *FINGERPRINTED}:
+            continue
+        url = "/" + path.relative_to(out_dir).as_posix()
+        text = _rewrite(url, path.read_text(encoding="utf-8"), manifest)
+        if path.name == "sw.js":
+            # New asset names need a fresh shell cache
+            text = _SHELL_VERSION.sub(rf"\g<1>\g<2>{build_id}\g<2>", text)
+        path.write_text(text, encoding="utf-8")
+
+
+def precompress(out_dir: Path) -> int:
+    """Write .gz/.br siblings for text assets; returns the number written."""
+    written = 0
+    for path in sorted(out_dir.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        encoded = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            encoded[".br"] = brotli.compress(data, quality=11)
+        for suffix, blob in encoded.items():
+            if len(blob) < len(data):
+                path.with_name(path.name + suffix).write_bytes(blob)
+                written += 1
+    return written
+
+
+def build(src: Path, out: Path) -> dict[str, str]:
+    if out.exists():
+        shutil.rmtree(out)
+    shutil.copytree(src, out, ignore=shutil.ignore_patterns("*.gz", "*.br"))
+    manifest = fingerprint(out)
+    rewrite_references(out, manifest)
+    (out / "asset-manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    compressed = precompress(out)
+    print(f"Fingerprinted {len(manifest)} assets, wrote {compressed} precompressed files to {out}")
+    if brotli is None:
+        print("  (brotli not installed: gzip variants only)")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--src", type=Path, default=ROOT_DIR / "frontend")
+    parser.add_argument("--out", type=Path, default=ROOT_DIR / "frontend_dist")
+    args = parser.parse_args()
+    build(args.src, args.out)
+
+
+if __name__ == "__main__":
+    main()
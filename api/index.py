@@ -7,29 +7,47 @@ if root_path not in sys.path:
     sys.path.insert(0, root_path)
 
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
+import csv
+import io
+import json
 import uuid
+import zlib
 
 import jwt as _jwt
 
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
 from sqlmodel import Session
 
+from app.application.click_totals import click_totals
 from app.application.menu_service import MenuService
+from app.application.popularity_service import WINDOWS as POPULARITY_WINDOWS, popularity
 from app.core.config import settings
-from app.domain.models import Category, ClickEvent, MenuItem, SubCategory
+from app.domain.models import Category, MenuItem, SubCategory
+from app.domain.repositories import AbstractClickRepository
+from app.infrastructure.admission import Admission, click_admission, client_ip
+from app.infrastructure.catalogue_version import catalogue_cache, catalogue_version
+from app.infrastructure.click_log import SegmentClickLog, compact_segments
+from app.infrastructure.click_repository import SqlClickRepository
 from app.infrastructure.database import create_db_and_tables, engine, get_session
+from app.infrastructure.job_repository import SqlJobRepository
+from app.infrastructure.jobs import jobs
 from app.infrastructure.menu_repository import SqlMenuRepository
+from app.infrastructure.metrics import MetricsMiddleware, registry as metrics_registry
+from app.infrastructure.popularity_repository import SqlPopularityRepository
+from app.infrastructure.static_files import CachedStaticFiles
 
 # Directories
 BACKEND_DIR = Path(__file__).parent
 UPLOAD_DIR = BACKEND_DIR / "static" / "uploads"
 FRONTEND_DIR = BACKEND_DIR.parent / "frontend"
+FRONTEND_BUILD_DIR = BACKEND_DIR.parent / "frontend_dist"  # output of build_frontend.py
 
 # Avoid creating directories on Vercel's read-only filesystem
 if not os.environ.get("VERCEL"):
@@ -103,6 +121,31 @@ class MenuItemCreate(BaseModel):
     foodpanda_url: str = ""
 
 
+class MenuItemUpdate(BaseModel):
+    model_config = {"extra": "forbid"}  # a misspelt field is an error, not a silent no-op
+
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    rating: Optional[float] = None
+    is_available: Optional[bool] = None
+    is_featured: Optional[bool] = None
+    category_id: Optional[int] = None
+    foodpanda_url: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _reject_nulls(self):
+        # Fields are optional so they can be omitted; only category_id may be cleared
+        nulls = sorted(f for f in self.model_fields_set if f != "category_id" and getattr(self, f) is None)
+        if nulls:
+            raise ValueError(f"Fields cannot be null: {', '.join(nulls)}")
+        return self
+
+
+class MenuItemPatch(BaseModel):
+    id: int
+    fields: MenuItemUpdate
 
 
 # ---------------------------------------------------------------------------
@@ -113,6 +156,39 @@ def get_menu_service(session: Session = Depends(get_session)) -> MenuService:
     return MenuService(SqlMenuRepository(session))
 
 
+# Optional file-backed click store (CLICK_STORE=segments); None means ClickEvent rows
+click_log: Optional[SegmentClickLog] = (
+    SegmentClickLog(Path(settings.CLICK_LOG_DIR), settings.CLICK_LOG_COMPACT_AFTER_DAYS)
+    if settings.CLICK_STORE == "segments" else None
+)
+
+
+def get_click_repository(session: Session = Depends(get_session)) -> AbstractClickRepository:
+    return click_log if click_log is not None else SqlClickRepository(session)
+
+
+def _available_item_ids() -> frozenset[int]:
+    """Ids of menu items that may appear in rankings; cached per catalogue version."""
+    def load():
+        with Session(engine) as session:
+            return frozenset(i.id for i in MenuService(SqlMenuRepository(session)).get_menu_items())
+    return catalogue_cache.get_or_load("available_item_ids", load)
+
+
+def catalogue_not_modified(request: Request, response: Response) -> Optional[Response]:
+    """Tag a catalogue response with its version; returns a 304 if the client already has it."""
+    version = catalogue_version.current()
+    headers = {
+        "ETag": f'W/"catalogue-{version}"',
+        "X-Catalogue-Version": str(version),
+        "Cache-Control": "no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Seed data
 # ---------------------------------------------------------------------------
@@ -175,6 +251,18 @@ def seed_database(session: Session) -> None:
 # App lifecycle
 # ---------------------------------------------------------------------------
 
+def _checkpoint_popularity() -> None:
+    with Session(engine) as session:
+        popularity.checkpoint(SqlPopularityRepository(session))
+
+
+def _prune_jobs() -> None:
+    with Session(engine) as session:
+        SqlJobRepository(session).prune_finished(
+            datetime.utcnow() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Lifespan: Starting up...")
@@ -184,9 +272,20 @@ async def lifespan(app: FastAPI):
         with Session(engine) as session:
             seed_database(session)
         print("Lifespan: Database seeding completed.")
+        with Session(engine) as session:
+            popularity.load_from(SqlPopularityRepository(session))
     except Exception as e:
         print(f"Lifespan Error: {str(e)}")
+    await jobs.start()
+    print("Lifespan: Background jobs started.")
     yield
+    await jobs.stop()
+    if click_log is not None:
+        click_log.close()
+    try:
+        _checkpoint_popularity()
+    except Exception as e:
+        print(f"Popularity checkpoint error: {e}")
 
 
 # ---------------------------------------------------------------------------
@@ -206,9 +305,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Serve uploaded images as static files
-app.mount("/static", StaticFiles(directory=UPLOAD_DIR.parent), name="static")
+app.add_middleware(MetricsMiddleware)
+
+# Serve uploaded images as static files (uuid names: never rewritten in place)
+app.mount(
+    "/static",
+    CachedStaticFiles(
+        directory=UPLOAD_DIR.parent,
+        immutable=True,
+        metadata_ttl=settings.STATIC_METADATA_TTL_SECONDS,
+    ),
+    name="static",
+)
 
 
 # ---------------------------------------------------------------------------
@@ -220,6 +328,11 @@ app.mount("/static", StaticFiles(directory=UPLOAD_DIR.parent), name="static")
 def health():
     return {"status": "ok", "app": settings.APP_NAME}
 
+@app.get("/api/catalogue/version")
+def get_catalogue_version():
+    """Current catalogue version; changes whenever menu or category data is edited."""
+    return {"version": catalogue_version.current()}
+
 @app.get("/api/debug")
 def debug_info():
     db_status = "unknown"
@@ -243,6 +356,27 @@ def debug_info():
     }
 
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-route request and DB metrics in Prometheus text format."""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/api/metrics/slow-queries")
+def slow_queries():
+    """Most recent statements that exceeded SLOW_QUERY_MS, with parameters."""
+    return {"threshold_ms": settings.SLOW_QUERY_MS, "queries": metrics_registry.slow_queries()}
+
+
+@app.get("/api/admin/jobs")
+def job_status():
+    """Background job queue depth and latencies for this worker, plus job-table counts."""
+    return {**jobs.snapshot(), "table": jobs.durable_snapshot()}
+
+
 # -- Auth --
 
 _JWT_SECRET  = os.environ.get("JWT_SECRET", "dev-secret-CHANGE-ME")
@@ -320,7 +454,7 @@ async def upload_image(file: UploadFile = File(...)):
         # ── Local filesystem fallback ───────────────────────────────
         UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
         dest = UPLOAD_DIR / filename
-        dest.write_bytes(content)
+        await run_in_threadpool(dest.write_bytes, content)  # keep disk I/O off the event loop
         return {"url": f"/static/uploads/{filename}"}
 
 
@@ -328,8 +462,18 @@ async def upload_image(file: UploadFile = File(...)):
 # -- Categories --
 
 @app.get("/api/categories", response_model=list[CategoryRead])
-def list_categories(svc: MenuService = Depends(get_menu_service)):
-    return svc.get_all_categories()
+def list_categories(
+    request: Request,
+    response: Response,
+    svc: MenuService = Depends(get_menu_service),
+):
+    not_modified = catalogue_not_modified(request, response)
+    if not_modified:
+        return not_modified
+    return catalogue_cache.get_or_load(
+        "categories",
+        lambda: [CategoryRead.model_validate(c) for c in svc.get_all_categories()],
+    )
 
 
 @app.post("/api/categories", response_model=CategoryRead, status_code=201)
@@ -386,16 +530,35 @@ def delete_subcategory(sub_id: int, session: Session = Depends(get_session)):
 
 @app.get("/api/menu", response_model=list[MenuItemRead])
 def list_menu(
+    request: Request,
+    response: Response,
     category_id: Optional[int] = None,
     svc: MenuService = Depends(get_menu_service),
 ):
-    items = svc.get_menu_items(category_id)
-    result = []
-    for item in items:
-        data = MenuItemRead.model_validate(item)
-        data.category_name = item.category.name if item.category else None
-        result.append(data)
-    return result
+    not_modified = catalogue_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
+    def load():
+        result = []
+        for item in svc.get_menu_items(category_id):
+            data = MenuItemRead.model_validate(item)
+            data.category_name = item.category.name if item.category else None
+            result.append(data)
+        return result
+
+    return catalogue_cache.get_or_load(("menu", category_id), load)
+
+
+@app.get("/api/menu/popular")
+def popular_items(window: str = "24h", limit: int = Query(10, ge=1, le=50)):
+    """Most-clicked items over a sliding window, served from memory."""
+    if window not in POPULARITY_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported window '{window}'. Use one of: {', '.join(POPULARITY_WINDOWS)}",
+        )
+    return {"window": window, "items": popularity.top(window, limit, eligible=_available_item_ids())}
 
 
 @app.post("/api/menu", response_model=MenuItemRead, status_code=201)
@@ -407,6 +570,19 @@ def create_menu_item(
     return svc.create_item(item)
 
 
+@app.patch("/api/menu")
+def bulk_update_menu_items(
+    patches: list[MenuItemPatch],
+    svc: MenuService = Depends(get_menu_service),
+):
+    """Apply many partial item updates (price, availability, ...) in one transaction."""
+    results = svc.bulk_update_items([
+        {"id": p.id, "fields": p.fields.model_dump(exclude_unset=True)}
+        for p in patches
+    ])
+    return {"results": results}
+
+
 @app.delete("/api/menu/{item_id}", status_code=204)
 def delete_menu_item(item_id: int, svc: MenuService = Depends(get_menu_service)):
     if not svc.delete_item(item_id):
@@ -433,28 +609,185 @@ def update_menu_item(
 # -- Analytics / Click Tracking --
 
 class ClickTrack(BaseModel):
-    item_id: Optional[int] = None
+    item_id: Optional[int] = Field(default=None, ge=1, le=2**31 - 1)  # None = main shop click
+
+def _record_click(item_id: Optional[int]) -> None:
+    if click_log is not None:
+        click_log.record(item_id)
+    else:
+        with Session(engine) as session:
+            SqlClickRepository(session).record(item_id)
+    if item_id is not None and item_id in _available_item_ids():
+        popularity.record(item_id)
+
+
+def _rollup_clicks() -> None:
+    """Fold settled clicks into the all-time totals so reads only recount a small tail."""
+    if click_log is not None:
+        click_totals.refresh(click_log)
+    else:
+        with Session(engine) as session:
+            click_totals.refresh(SqlClickRepository(session))
+
+
+def _all_time_click_counts(clicks: AbstractClickRepository) -> dict[Optional[int], int]:
+    """All-time totals: the running totals plus clicks since their watermark."""
+    return click_totals.refresh(clicks)
+
 
 @app.post("/api/analytics/track")
-def track_click(payload: ClickTrack, session: Session = Depends(get_session)):
-    """Record a FoodPanda redirect click."""
-    event = ClickEvent(item_id=payload.item_id)
-    session.add(event)
-    session.commit()
+async def track_click(payload: ClickTrack, request: Request, response: Response):
+    """Record a FoodPanda redirect click.
+
+    Admission runs on the event loop so rejected clicks never wait for a
+    worker thread or a DB connection. Duplicates and shed clicks get 202
+    (accepted, not stored) so clients have no reason to retry.
+
+    Admitted clicks are written by the job runner and answered with 202
+    right away. Each one keeps its write-backlog slot until the job has
+    finished, so TRACK_MAX_BACKLOG still bounds pending writes. Clicks the
+    job queue refuses are shed. Queued clicks are persisted to the job
+    table on shutdown and lost only if the process crashes. Without a
+    running job runner, clicks are written before responding.
+    """
+    client = client_ip(request.headers, request.client.host if request.client else None)
+    decision = click_admission.admit(client, payload.item_id)
+    if decision is Admission.RATE_LIMITED:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many clicks",
+            headers={"Retry-After": str(click_admission.retry_after())},
+        )
+    if decision is not Admission.ADMITTED:
+        response.status_code = 202
+        return {"ok": True, "recorded": False}
+    if jobs.running:
+        response.status_code = 202
+        if jobs.submit("record_click", payload.item_id):
+            return {"ok": True, "queued": True}  # the job releases the backlog slot
+        click_admission.done()
+        return {"ok": True, "recorded": False}
+    try:
+        await run_in_threadpool(_record_click, payload.item_id)
+    finally:
+        click_admission.done()
     return {"ok": True}
 
 
+def _utc_naive(dt: Optional[datetime]) -> Optional[datetime]:
+    """Query timestamps with an offset ("...Z") as naive UTC, like stored created_at values."""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 @app.get("/api/analytics/clicks")
-def get_click_stats(session: Session = Depends(get_session)):
+def get_click_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    clicks: AbstractClickRepository = Depends(get_click_repository),
+):
     """Return total clicks and per-item click counts."""
-    from sqlmodel import select, func
-    all_events = session.exec(select(ClickEvent)).all()
-    total = len(all_events)
-    per_item: dict = {}
-    for e in all_events:
-        key = str(e.item_id or "shop")
-        per_item[key] = per_item.get(key, 0) + 1
-    return {"total_clicks": total, "per_item": per_item}
+    since, until = _utc_naive(since), _utc_naive(until)
+    if since is None and until is None:
+        counts = _all_time_click_counts(clicks)
+    else:
+        counts = clicks.count_per_item(since, until)
+    per_item = {str(item_id or "shop"): n for item_id, n in counts.items()}
+    return {"total_clicks": sum(counts.values()), "per_item": per_item}
+
+
+@app.get("/api/analytics/clicks/histogram")
+def get_click_histogram(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket_seconds: int = Query(3600, ge=60),
+    clicks: AbstractClickRepository = Depends(get_click_repository),
+):
+    """Click counts per time bucket (default: hourly over the last 24 h)."""
+    since, until = _utc_naive(since), _utc_naive(until)
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=1)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be before 'until'")
+    if (until - since).total_seconds() / bucket_seconds > 10_000:
+        raise HTTPException(status_code=400, detail="Too many buckets; widen bucket_seconds")
+    return {
+        "bucket_seconds": bucket_seconds,
+        "buckets": [{"start": start, "clicks": n} for start, n in clicks.histogram(since, until, bucket_seconds)],
+    }
+
+
+_EXPORT_BATCH = 1000
+
+
+def _iter_click_rows(since, until, item_ids):
+    """Yield (id, item_id, created_at) batches from the configured click store."""
+    if click_log is not None:
+        yield from click_log.iter_events(since, until, item_ids, _EXPORT_BATCH)
+        return
+    # The request-scoped session is closed before a streamed body is sent,
+    # so the export owns its own session for the lifetime of the generator.
+    with Session(engine) as session:
+        yield from SqlClickRepository(session).iter_events(since, until, item_ids, _EXPORT_BATCH)
+
+
+def _encode_ndjson(batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps({"id": r[0], "item_id": r[1], "created_at": r[2].isoformat()}) + "\n"
+            for r in batch
+        ).encode()
+
+
+def _encode_csv(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["id", "item_id", "created_at"])
+    for batch in batches:
+        writer.writerows(
+            (r[0], "" if r[1] is None else r[1], r[2].isoformat()) for r in batch
+        )
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+@app.get("/api/analytics/events/export")
+def export_click_events(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    item_id: Optional[list[int]] = Query(None),
+    gzip: bool = False,
+):
+    """Stream raw click events as NDJSON or CSV in constant memory."""
+    since, until = _utc_naive(since), _utc_naive(until)
+    batches = _iter_click_rows(since, until, item_id)
+    if format == "csv":
+        body, media_type = _encode_csv(batches), "text/csv"
+    else:
+        body, media_type = _encode_ndjson(batches), "application/x-ndjson"
+    filename = f"click_events.{format}"
+    if gzip:
+        body, media_type = _gzip_stream(body), "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 # -- Orders (REMOVED — redirecting to FoodPanda) --
@@ -464,16 +797,44 @@ def get_click_stats(session: Session = Depends(get_session)):
 # -- Dashboard (legacy stub for admin compatibility) --
 
 @app.get("/api/dashboard/stats")
-def dashboard_stats_stub(session: Session = Depends(get_session)):
+def dashboard_stats_stub(clicks: AbstractClickRepository = Depends(get_click_repository)):
     """Stub: returns click analytics for the admin dashboard."""
-    from sqlmodel import select
-    all_events = session.exec(select(ClickEvent)).all()
-    return {"total_clicks": len(all_events), "orders": 0, "revenue": 0}
+    return {"total_clicks": sum(_all_time_click_counts(clicks).values()), "orders": 0, "revenue": 0}
 
 
 
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
 
+_DAY_SECONDS = 24 * 3600
 
-# Serve frontend as static files (Local dev fallback)
+jobs.register(
+    "record_click", _record_click, max_attempts=3,
+    on_finished=lambda item_id: click_admission.done(),
+)
+jobs.register("popularity_checkpoint", _checkpoint_popularity)
+jobs.register("analytics_rollup", _rollup_clicks)
+jobs.register("prune_jobs", _prune_jobs)
+jobs.every(settings.POPULARITY_CHECKPOINT_SECONDS, "popularity_checkpoint")
+jobs.every(settings.ANALYTICS_ROLLUP_SECONDS, "analytics_rollup")
+jobs.every(_DAY_SECONDS, "prune_jobs", durable=True)
+if click_log is not None:
+    jobs.register("compact_click_log", compact_segments, cpu=True)
+    jobs.every(
+        _DAY_SECONDS, "compact_click_log",
+        settings.CLICK_LOG_DIR, settings.CLICK_LOG_COMPACT_AFTER_DAYS, durable=True,
+    )
+
+
+# Serve frontend as static files (Local dev fallback); prefer the fingerprinted build
 if FRONTEND_DIR.exists() and not os.environ.get("VERCEL"):
-    app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="frontend")
+    app.mount(
+        "/",
+        CachedStaticFiles(
+            directory=FRONTEND_BUILD_DIR if FRONTEND_BUILD_DIR.exists() else FRONTEND_DIR,
+            html=True,
+            metadata_ttl=settings.STATIC_METADATA_TTL_SECONDS,
+        ),
+        name="frontend",
+    )
@@ -2,6 +2,8 @@
  * Central fetch utility.
  * All API calls go through here so the base URL is always consistent.
  */
+export { onCatalogueUpdate } from "./offline.js";
+
 const API_BASE = "";
 
 export async function fetchJSON(path, opts = {}) {
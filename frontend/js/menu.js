@@ -2,7 +2,7 @@
  * Menu page logic — loads categories & items from the API,
  * renders food cards, and redirects to FoodPanda on order.
  */
-import { api, FOODPANDA_URL } from './api.js';
+import { api, FOODPANDA_URL, onCatalogueUpdate } from './api.js';
 
 let selectedCategoryId = null;
 
@@ -112,4 +112,5 @@ document.addEventListener('DOMContentLoaded', async () => {
   await loadCategories();
   await loadMenuItems();
   setupSearch();
+  onCatalogueUpdate(() => loadMenuItems());
 });
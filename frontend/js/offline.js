@@ -0,0 +1,20 @@
+/**
+ * Registers the storefront service worker (see /sw.js) and relays its
+ * "catalogue updated" messages so pages can re-render fresh menu data.
+ */
+const listeners = new Set();
+
+if ('serviceWorker' in navigator && !location.pathname.startsWith('/admin')) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js').catch(() => null); // Offline support is optional
+  });
+  navigator.serviceWorker.addEventListener('message', (event) => {
+    if (event.data?.type === 'catalogue-updated') {
+      listeners.forEach((cb) => cb(event.data.version));
+    }
+  });
+}
+
+export function onCatalogueUpdate(callback) {
+  listeners.add(callback);
+}
@@ -0,0 +1,174 @@
+/**
+ * Storefront service worker — makes repeat visits render from cache.
+ *
+ *  - App shell (pages, JS, logo, CDN styles/fonts): stale-while-revalidate.
+ *  - /api/menu and /api/categories: stale-while-revalidate keyed to the
+ *    server's catalogue version. A response carrying a newer
+ *    X-Catalogue-Version drops every cached catalogue response and tells
+ *    open pages to re-render.
+ *  - Images: cache-first, LRU-bounded to IMAGE_CACHE_MAX_ENTRIES.
+ *
+ * Admin pages are never served from these caches.
+ * Bump SHELL_VERSION when the shell file list changes (build_frontend.py
+ * sets it from the asset hashes and points SHELL_URLS at the hashed files).
+ */
+const SHELL_VERSION = 'v1';
+const SHELL_CACHE = `mady-shell-${SHELL_VERSION}`;
+const API_CACHE = 'mady-catalogue';
+const IMAGE_CACHE = 'mady-images';
+const IMAGE_CACHE_MAX_ENTRIES = 120;
+const REVALIDATE_INTERVAL_MS = 15_000; // per URL, limits origin traffic from busy pages
+
+const SHELL_URLS = [
+  '/',
+  '/index.html',
+  '/menu.html',
+  '/cart.html',
+  '/checkout.html',
+  '/confirmation.html',
+  '/js/api.js',
+  '/js/offline.js',
+  '/js/menu.js',
+  '/js/cart.js',
+  '/js/checkout.js',
+  '/assets/images/mady_logo.jpeg',
+  '/assets/images/mady_hero.jfif',
+];
+const SHELL_HOSTS = ['cdn.tailwindcss.com', 'fonts.googleapis.com', 'fonts.gstatic.com'];
+const CATALOGUE_PATHS = ['/api/menu', '/api/categories'];
+
+const lastRevalidated = new Map();
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then((cache) => cache.addAll(SHELL_URLS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const keep = new Set([SHELL_CACHE, API_CACHE, IMAGE_CACHE]);
+    for (const key of await caches.keys()) {
+      if (key.startsWith('mady-') && !keep.has(key)) await caches.delete(key);
+    }
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+
+  const url = new URL(request.url);
+  const fromAdmin = request.referrer && new URL(request.referrer).pathname.startsWith('/admin');
+  if (fromAdmin || url.pathname.startsWith('/admin')) return;
+
+  if (url.origin === self.location.origin && CATALOGUE_PATHS.includes(url.pathname)) {
+    event.respondWith(catalogue(event));
+  } else if (request.destination === 'image') {
+    event.respondWith(image(event));
+  } else if (
+    (url.origin === self.location.origin && !url.pathname.startsWith('/api/'))
+    || SHELL_HOSTS.includes(url.hostname)
+  ) {
+    event.respondWith(shell(event));
+  }
+});
+
+// ── App shell ────────────────────────────────────────────────
+
+async function shell(event) {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(event.request, { ignoreSearch: event.request.mode === 'navigate' });
+  const network = fetch(event.request)
+    .then((res) => {
+      if (res.ok || res.type === 'opaque') cache.put(event.request, res.clone()).catch(() => null);
+      return res;
+    })
+    .catch(() => cached);
+  if (cached) {
+    event.waitUntil(network);
+    return cached;
+  }
+  return network;
+}
+
+// ── Catalogue data ───────────────────────────────────────────
+
+function versionOf(res) {
+  return Number(res && res.headers.get('X-Catalogue-Version')) || 0;
+}
+
+async function catalogue(event) {
+  const { request } = event;
+  const cache = await caches.open(API_CACHE);
+  const cached = await cache.match(request);
+
+  const last = lastRevalidated.get(request.url) || 0;
+  if (cached && Date.now() - last < REVALIDATE_INTERVAL_MS) return cached;
+  lastRevalidated.set(request.url, Date.now());
+
+  const revalidate = revalidateCatalogue(cache, request, cached);
+  if (cached) {
+    event.waitUntil(revalidate.catch(() => null));
+    return cached;
+  }
+  return revalidate;
+}
+
+async function revalidateCatalogue(cache, request, cached) {
+  const headers = new Headers(request.headers);
+  const etag = cached && cached.headers.get('ETag');
+  if (etag) headers.set('If-None-Match', etag);
+
+  const res = await fetch(request.url, { headers, credentials: 'same-origin' });
+  if (res.status === 304) return cached;
+  if (!res.ok) return cached || res;
+
+  const version = versionOf(res);
+  const moved = cached && version > versionOf(cached);
+  try {
+    // The catalogue moved: every cached menu/category response is stale
+    if (moved) for (const key of await cache.keys()) await cache.delete(key);
+    await cache.put(request, res.clone());
+  } catch (err) {
+    // Storage errors (e.g. quota) only cost the cache, not this response
+  }
+  if (moved) {
+    const pages = await self.clients.matchAll({ type: 'window' });
+    pages.forEach((page) => page.postMessage({ type: 'catalogue-updated', version }));
+  }
+  return res;
+}
+
+// ── Images ───────────────────────────────────────────────────
+
+async function image(event) {
+  const { request } = event;
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(request);
+  if (cached) {
+    // Re-insert so the key order doubles as recency order
+    const copy = cached.clone();
+    event.waitUntil(cache.delete(request).then(() => cache.put(request, copy)).catch(() => null));
+    return cached;
+  }
+  const res = await fetch(request);
+  if (res.ok || res.type === 'opaque') {
+    // Best effort: opaque responses count heavily against the quota, and a
+    // failed put must not fail an image that loaded fine
+    event.waitUntil(
+      cache.put(request, res.clone()).then(() => trimImages(cache)).catch(() => null)
+    );
+  }
+  return res;
+}
+
+async function trimImages(cache) {
+  const keys = await cache.keys();
+  for (let i = 0; i < keys.length - IMAGE_CACHE_MAX_ENTRIES; i++) {
+    await cache.delete(keys[i]);
+  }
+}